@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from findings_db import DEFAULT_DB_NAME
+from http_engine import DEFAULT_CONCURRENCY
+from dns_resolution_module import DEFAULT_DNS_CONCURRENCY
+from cert_data_module import DEFAULT_CERT_WORKERS
+from bucket_audit_module import DEFAULT_PROVIDER_CONCURRENCY
+from pipeline import STAGE_ALIASES, SharedData, select_stages, run_pipeline, format_critical_path
+from reporting_module import generate_reports
+from session_store import SessionStore, start_session, resume_session, checkpoint, is_complete
+
+DEFAULT_WORKERS = 4
+DEFAULT_STAGE_WORKERS = 2
+
+
+def load_targets(path):
+    """
+    One root domain per line, optionally followed by ",Company Name".
+    Blank lines and lines starting with # are ignored.
+    """
+    targets = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            domain, _, company = line.partition(",")
+            targets.append((domain.strip().lower(), company.strip()))
+    return targets
+
+
+def target_dir_name(domain):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", domain)
+
+
+def run_target(domain, company, options):
+    """Run one root domain as an isolated session; executes in a worker process."""
+    out_dir = os.path.join(options["output_dir"], target_dir_name(domain))
+    os.makedirs(out_dir, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(out_dir, "deep_recon.log"))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+    shared_data = SharedData(
+        root_domain=domain,
+        company_name=company,
+        report_filename=target_dir_name(domain),
+        output_dir=out_dir,
+        non_interactive=True,
+        fast_mode=options["fast_mode"],
+        verbose_mode=not options["fast_mode"],
+        **options["settings"]
+    )
+    store = SessionStore()
+    previous = store.list_sessions(root_domain=domain, limit=1) if options["resume"] else []
+    if not (previous and resume_session(shared_data, previous[0][0], store)):
+        start_session(shared_data, store)
+    errors = {}
+    started = time.monotonic()
+
+    def runner(name, func, data):
+        logging.info(f"[{domain}] Starting {name}")
+        try:
+            func(data)
+        except Exception as e:
+            errors[name] = str(e)
+            logging.error(f"[{domain}] Error in {name}: {e}")
+        else:
+            checkpoint(data, func)
+            logging.info(f"[{domain}] {name} complete")
+
+    try:
+        stages = [(name, module) for name, module in select_stages(options["modules"])
+                  if not is_complete(shared_data, module)]
+        durations, path, total = run_pipeline(stages, shared_data, runner, options["stage_workers"])
+        logging.info(f"[{domain}] {format_critical_path(path, durations, total)}")
+        reports = generate_reports(shared_data, output_dir=out_dir)
+    finally:
+        root_logger.removeHandler(handler)
+        handler.close()
+        store.close()
+    return {"domain": domain, "session_id": shared_data["session_id"], "output_dir": out_dir,
+            "reports": reports, "errors": errors, "elapsed": round(time.monotonic() - started, 1)}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="deep_recon_cli.py",
+        description="Run Deep_Recon non-interactively against every root domain in a targets file."
+    )
+    parser.add_argument("--targets", required=True, help="file with one root domain per line (optionally 'domain,Company')")
+    parser.add_argument("--modules", default="all",
+                        help=f"comma-separated modules or 'all'. Available: {', '.join(STAGE_ALIASES)}")
+    parser.add_argument("--output-dir", default="output", help="parent directory for per-target output")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="root domains processed in parallel (one process each)")
+    parser.add_argument("--stage-workers", type=int, default=DEFAULT_STAGE_WORKERS,
+                        help="modules run in parallel within one target")
+    parser.add_argument("--full", action="store_true", help="disable fast-mode limits")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-probe hosts that are new, changed IP or have expiring certs since the last session")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue each target's latest saved session, skipping completed modules")
+    parser.add_argument("--http-concurrency", type=int, default=None,
+                        help=f"total in-flight HTTP requests across all workers (default {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--wordlist", default=None,
+                        help="path fuzzing wordlist file, one path per line (default: built-in list)")
+    args = parser.parse_args(argv)
+    args.modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    try:
+        select_stages(args.modules)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    targets = load_targets(args.targets)
+
+    workers = max(1, min(args.workers, len(targets) or 1))
+    stage_workers = max(1, args.stage_workers)
+    # Every module opens its own connection pool, so global budgets are divided between
+    # all modules that can run at once; the Shodan client is shared per process
+    slots = workers * stage_workers
+
+    def share(total):
+        return max(1, total // slots)
+
+    options = {
+        "modules": args.modules,
+        "output_dir": args.output_dir,
+        "fast_mode": not args.full,
+        "resume": args.resume,
+        "stage_workers": stage_workers,
+        "settings": {
+            "http_concurrency": share(args.http_concurrency or DEFAULT_CONCURRENCY),
+            "dns_concurrency": share(DEFAULT_DNS_CONCURRENCY),
+            "cert_workers": share(DEFAULT_CERT_WORKERS),
+            "bucket_concurrency": share(DEFAULT_PROVIDER_CONCURRENCY),
+            "shodan_rate": 1.0 / workers,
+            "incremental_mode": args.incremental,
+            "findings_db": os.path.join(args.output_dir, DEFAULT_DB_NAME),
+            "path_wordlist": args.wordlist,
+        }
+    }
+    logging.info(f"Scanning {len(targets)} targets with {workers} processes x {stage_workers} module threads "
+                 f"({options['settings']['http_concurrency']} HTTP requests in flight per module)")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_target, domain, company, options): domain for domain, company in targets}
+        for future in as_completed(futures):
+            domain = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                logging.error(f"{domain} failed: {e}")
+                continue
+            status = f"{len(result['errors'])} module errors" if result["errors"] else "ok"
+            logging.info(f"{domain} finished in {result['elapsed']}s ({status}) -> {result['output_dir']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
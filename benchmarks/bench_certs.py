@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Sequential vs pooled certificate harvesting against a local TLS fleet.
+
+Starts one TLS listener that waits --delay seconds before each handshake
+(a stand-in for network round trips) and presents a self-signed
+certificate valid for 127.0.0.1-127.0.0.N, trusted through SSL_CERT_FILE.
+Needs the openssl command line tool.
+
+    python3 benchmarks/bench_certs.py --hosts 100 --delay 0.1
+"""
+import argparse
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cert_data_module import get_cert_info, harvest_certs  # noqa: E402
+
+
+def make_cert(directory, hosts):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    san = ",".join(f"IP:{h}" for h in hosts)
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=bench.test", "-addext", f"subjectAltName={san}",
+                    "-keyout", key, "-out", cert], check=True, capture_output=True)
+    return cert, key
+
+
+def serve(cert, key, delay):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    listener = socket.socket()
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("0.0.0.0", 0))
+    listener.listen(256)
+
+    def handle(conn):
+        time.sleep(delay)
+        try:
+            context.wrap_socket(conn, server_side=True).close()
+        except (OSError, ssl.SSLError):
+            conn.close()
+
+    def accept():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.1, help="seconds added before each handshake")
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    hosts = [f"127.0.0.{i}" for i in range(1, args.hosts + 1)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_cert(tmp, hosts)
+        os.environ["SSL_CERT_FILE"] = cert
+        port = serve(cert, key, args.delay)
+
+        started = time.perf_counter()
+        sequential = {h: get_cert_info(h, port) for h in hosts}
+        sequential_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pooled = harvest_certs(hosts, workers=args.workers, port=port)
+        pooled_time = time.perf_counter() - started
+
+    print(f"{args.hosts} hosts, {args.delay * 1000:.0f}ms per handshake")
+    print(f"  sequential get_cert_info: {sequential_time:6.2f}s ({sum(1 for c in sequential.values() if c)} certs)")
+    print(f"  harvest_certs, {args.workers} workers: {pooled_time:6.2f}s ({len(pooled)} certs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Page extractors before and after the shared single-pass parse: the
+original extract_embedded_code, extract_js_config_links and
+extract_third_party_domains each built their own BeautifulSoup tree.
+The baseline needs beautifulsoup4 and is skipped without it.
+
+    python3 benchmarks/bench_html_extract.py --tags 12000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import html_document  # noqa: E402
+from risk_utils import extract_embedded_code, extract_js_config_links  # noqa: E402
+from supply_chain_module import extract_third_party_domains  # noqa: E402
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # optional; only the "before" numbers need it
+    BeautifulSoup = None
+
+BASE_URL = "https://www.bench.test"
+
+
+def old_extract_embedded_code(html):
+    embedded = []
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup.find_all("script"):
+        if script.string:
+            code = script.string.strip()
+            if any(x in code.lower() for x in ["modbus", "bacnet", "opc", "mqtt", "ladder", "firmware"]):
+                embedded.append(code[:200])
+    return embedded
+
+
+def old_extract_js_config_links(html, base_url):
+    js_links = []
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup.find_all("script", src=True):
+        src = script["src"]
+        if any(x in src.lower() for x in ["config", "settings", "init", "firmware"]):
+            js_links.append(urljoin(base_url, src))
+    return js_links
+
+
+def old_extract_third_party_domains(html, base_url):
+    soup = BeautifulSoup(html, "html.parser")
+    domains = set()
+    for tag in soup.find_all(["script", "link", "img", "iframe"]):
+        src = tag.get("src") or tag.get("href")
+        if src:
+            domain = urlparse(urljoin(base_url, src)).netloc
+            if domain and not domain.endswith(base_url):
+                domains.add(domain)
+    return list(domains)
+
+
+def make_page(tags, scripts, rng):
+    hosts = [f"cdn{i}.vendor{i % 7}.example" for i in range(40)] + ["www.bench.test"]
+    parts = ["<!DOCTYPE html><html><head><title>Bench page</title></head><body>"]
+    for i in range(tags):
+        host = rng.choice(hosts)
+        kind = i % 4
+        if kind == 0:
+            name = rng.choice(["app", "config", "settings", "vendor", "init"])
+            parts.append(f'<script src="https://{host}/js/{name}.{i}.js"></script>')
+        elif kind == 1:
+            parts.append(f'<link rel="stylesheet" href="//{host}/css/{i}.css">')
+        elif kind == 2:
+            parts.append(f'<img src="/img/{i}.png" alt="picture {i}"><p>caption {i} &amp; more text</p>')
+        else:
+            parts.append(f'<div class="row"><iframe src="https://{host}/embed/{i}"></iframe></div>')
+    for i in range(scripts):
+        marker = rng.choice(["modbus", "mqtt", "analytics", "firmware", "tracking"])
+        parts.append(f"<script>var cfg{i} = {{name: '{marker}', items: [{', '.join(map(str, range(200)))}]}};</script>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def extract_all(html, embedded, config_links, third_party):
+    return (embedded(html), config_links(html, BASE_URL), sorted(third_party(html, BASE_URL)))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tags", type=int, default=12000, help="resource tags on the page")
+    parser.add_argument("--scripts", type=int, default=20, help="inline scripts on the page")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    html = make_page(args.tags, args.scripts, random.Random(args.seed))
+    megabytes = len(html.encode()) / 1024 / 1024
+    print(f"{megabytes:.2f}MB page, {args.tags} resource tags, {args.scripts} inline scripts")
+
+    after_ms, after = timed(extract_all, html, extract_embedded_code, extract_js_config_links,
+                            extract_third_party_domains)
+    cached_ms, _ = timed(extract_all, html, extract_embedded_code, extract_js_config_links,
+                         extract_third_party_domains)
+    if BeautifulSoup is not None:
+        before_ms, before = timed(extract_all, html, old_extract_embedded_code, old_extract_js_config_links,
+                                  old_extract_third_party_domains)
+        assert before == after, "extractors disagree"
+        print(f"  before, three BeautifulSoup parses: {before_ms:7.0f}ms ({before_ms / megabytes:6.0f}ms/MB)")
+        soup_ms, _ = timed(BeautifulSoup, html, "html.parser")
+        print(f"  one BeautifulSoup parse:            {soup_ms:7.0f}ms ({soup_ms / megabytes:6.0f}ms/MB)")
+    else:
+        print("  beautifulsoup4 is not installed; skipping the baseline")
+    print(f"  after, one shared parse:            {after_ms:7.0f}ms ({after_ms / megabytes:6.0f}ms/MB)")
+    print(f"  after, document already cached:     {cached_ms:7.0f}ms")
+    html_document._cache.clear()
+    parse_ms, _ = timed(html_document.parse_document, html)
+    print(f"  one parse_document call:            {parse_ms:7.0f}ms ({parse_ms / megabytes:6.0f}ms/MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Per-ASN CIDR collapsing and longest-prefix lookups on a synthetic grid.
+
+Addresses are drawn from random /24s spread over a number of ASNs. The
+baselines are ipaddress.collapse_addresses and the original membership
+test against a list of "ip/32" strings.
+
+    python3 benchmarks/bench_ip_index.py --addresses 1000000
+"""
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ip_index  # noqa: E402
+
+
+def make_grid(addresses, blocks, asns, rng):
+    prefixes = rng.sample(range(1 << 24), blocks)
+    owners = {p: f"AS{64512 + rng.randrange(asns)}" for p in prefixes}
+    entries = []
+    for _ in range(addresses):
+        prefix = rng.choice(prefixes)
+        value = prefix << 8 | rng.randrange(256)
+        entries.append((str(ipaddress.IPv4Address(value)), owners[prefix]))
+    return entries
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--addresses", type=int, default=1000000)
+    parser.add_argument("--blocks", type=int, default=8000, help="distinct /24s the addresses fall into")
+    parser.add_argument("--asns", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--baseline", type=int, default=200000,
+                        help="addresses given to ipaddress.collapse_addresses")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    entries = make_grid(args.addresses, args.blocks, args.asns, rng)
+    print(f"{args.addresses} addresses in {args.blocks} /24s over {args.asns} ASNs")
+
+    elapsed, cidrs = timed(ip_index.collapse_by_asn, entries)
+    print(f"  collapse_by_asn: {sum(map(len, cidrs.values()))} CIDRs in {elapsed:.2f}s")
+
+    sample = entries[:args.baseline]
+    networks = [ipaddress.ip_network(ip) for ip, _ in sample]
+    elapsed, _ = timed(lambda: list(ipaddress.collapse_addresses(networks)))
+    print(f"  ipaddress.collapse_addresses on {len(sample)} addresses: {elapsed:.2f}s")
+
+    elapsed, index = timed(ip_index.build_index, cidrs)
+    print(f"  build_index: {len(index)} prefixes in {elapsed:.2f}s")
+
+    # Half the probes are grid addresses, half random addresses that mostly miss
+    probes = [ip for ip, _ in rng.sample(entries, args.lookups // 2)]
+    probes += [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups - len(probes))]
+    elapsed, hits = timed(lambda: sum(1 for ip in probes if ip in index))
+    print(f"  PrefixIndex lookups: {elapsed / len(probes) * 1e6:.1f}us each ({hits}/{len(probes)} in grid)")
+
+    grid_list = [f"{ip}/32" for ip, _ in entries]
+    slow_probes = probes[:20]
+    elapsed, _ = timed(lambda: [f"{ip}/32" in grid_list for ip in slow_probes])
+    print(f"  'ip/32' list membership: {elapsed / len(slow_probes) * 1000:.1f}ms each")
+
+
+if __name__ == "__main__":
+    main()
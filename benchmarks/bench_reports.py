@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Report writer time and peak allocation on a synthetic session.
+
+The baselines are the original writers: JSON through json.dump(indent=2),
+and HTML rendered into one string with Template.render() before writing.
+Peak memory is measured with tracemalloc, so it counts Python allocations
+made while writing, not the session itself; tracing slows every writer
+down by about the same factor.
+
+    python3 benchmarks/bench_reports.py --hosts 50000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import reporting_module  # noqa: E402
+
+
+def make_session(hosts):
+    names = [f"h{i}.bench.test" for i in range(hosts)]
+    return {
+        "root_domain": "bench.test",
+        "subdomains": names,
+        "cloud_fingerprint": {h: {"status_code": 200, "cloud_providers": ["AWS"],
+                                  "headers": {f"X-H{k}": "v" * 40 for k in range(12)}} for h in names},
+        "shodan_results": {h: {"ip": "192.0.2.1", "data": {"ports": [80, 443, 502], "data": [
+            {"port": p, "banner": "b" * 300, "vulns": {"CVE-2020-0001": {"cvss": 7.5}}} for p in (80, 443, 502)
+        ]}} for h in names},
+        "supply_chain": {h: ["cdn.example", "fonts.example"] for h in names},
+    }
+
+
+def old_json_report(data, base_path):
+    with open(base_path + ".json", "w") as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+class _RenderedTemplate(reporting_module.Template):
+    """The report template as the original writer used it: render() all of it, then write."""
+
+    def stream(self, *args, **kwargs):
+        rendered = self.render(*args, **kwargs)
+
+        class Whole:
+            @staticmethod
+            def dump(f):
+                f.write(rendered)
+        return Whole
+
+
+def old_html_report(data, base_path):
+    streaming = reporting_module.Template
+    reporting_module.Template = _RenderedTemplate
+    try:
+        reporting_module.save_html_report(data, base_path)
+    finally:
+        reporting_module.Template = streaming
+
+
+WRITERS = [
+    ("json.dump (before)", old_json_report),
+    ("save_json_report", reporting_module.save_json_report),
+    ("save_jsonl_report", reporting_module.save_jsonl_report),
+    ("save_jsonl_report gz", lambda data, base: reporting_module.save_jsonl_report(data, base, True)),
+    ("save_csv_report", reporting_module.save_csv_report),
+    ("Template.render (before)", old_html_report),
+    ("save_html_report", reporting_module.save_html_report),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=50000)
+    args = parser.parse_args()
+
+    data = make_session(args.hosts)
+    print(f"{args.hosts} hosts")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (name, writer) in enumerate(WRITERS):
+            tracemalloc.start()
+            started = time.perf_counter()
+            writer(data, os.path.join(tmp, f"report{i}"))
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {name:24s} {elapsed:6.2f}s  peak {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Error page, supply-chain and JS keyword scans before and after the shared
+signature engine, on generated pages with and without indicators. The
+original regex loop and substring checks are kept here as the baseline.
+
+    python3 benchmarks/bench_signatures.py --sizes 1 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from error_page_extraction_module import ERROR_SIGNATURES, extract_errors  # noqa: E402
+from risk_utils import JS_SIGNATURES, SUPPLY_CHAIN_KEYWORDS, SUPPLY_CHAIN_SIGNATURES, scan_for_supply_chain  # noqa: E402
+
+OLD_ERROR_PATTERNS = [
+    r"(?i)(?<=<!--).*?error.*?(?=-->)",
+    r"(?i)<title>.*?error.*?</title>",
+    r"(?i)exception.*?<br />",
+    r"(?i)\\berror [0-9]{3}\\b",
+    r"(?i)(stack trace|stacktrace)",
+    r"(?i)(SQL syntax|mysqli|pg_query|mysql_fetch|sql error|db error)"
+]
+OLD_JS_KEYWORDS = ["token", "apikey", "modbus", "plc", "vendor", "admin"]
+INDICATORS = " Siemens S7 PLC <!-- db error here --> Stack Trace"
+WORDS = "lorem ipsum dolor sit amet notice topics bottom div class span href data value".split()
+CHUNK = 64 * 1024
+
+
+def old_extract_errors(html):
+    found = []
+    for pattern in OLD_ERROR_PATTERNS:
+        found.extend(re.findall(pattern, html, re.IGNORECASE))
+    return list(set(found))
+
+
+def old_scan_for_supply_chain(content):
+    content_lower = content.lower()
+    return list({(key, message) for key, message in SUPPLY_CHAIN_KEYWORDS.items() if key in content_lower})
+
+
+def old_js_check(code):
+    code = code.lower()
+    return any(x in code for x in OLD_JS_KEYWORDS)
+
+
+def make_page(megabytes, indicators, rng):
+    parts, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        line = " ".join(rng.choices(WORDS, k=12))
+        if indicators and rng.random() < 0.001:
+            line += INDICATORS
+        parts.append(line + "\n")
+        size += len(line) + 1
+    parts.append("<title>Server Error 500</title> Error 502 exception foo<br />")
+    return "".join(parts)
+
+
+def best_of(fn, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def streamed(signatures, data, max_bytes=None):
+    scanner = signatures.scanner(max_bytes)
+    for i in range(0, len(data), CHUNK):
+        scanner.feed_bytes(data[i:i + CHUNK])
+        if scanner.full:
+            break
+    return scanner.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5], help="page sizes in MB")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    cases = [
+        ("extract_errors", old_extract_errors, extract_errors),
+        ("scan_for_supply_chain", old_scan_for_supply_chain, scan_for_supply_chain),
+        ("JS keywords", old_js_check, JS_SIGNATURES.scan),
+    ]
+    print(f"{'page':18s} {'scan':22s} {'before':>10s} {'after':>10s}")
+    for megabytes in args.sizes:
+        for indicators in (True, False):
+            html = make_page(megabytes, indicators, rng)
+            label = f"{megabytes}MB {'indicators' if indicators else 'clean'}"
+            for name, before, after in cases:
+                print(f"{label:18s} {name:22s} {best_of(before, html):8.1f}ms {best_of(after, html):8.1f}ms")
+
+            # A page fed in chunks must report the same signatures as the whole page
+            data = html.encode()
+            for signatures in (ERROR_SIGNATURES, SUPPLY_CHAIN_SIGNATURES):
+                assert {n for n, _ in streamed(signatures, data)} == {n for n, _ in signatures.scan(html)}
+
+    html = make_page(max(args.sizes), True, rng)
+    data = html.encode()
+    for name, signatures in (("errors", ERROR_SIGNATURES), ("supply chain", SUPPLY_CHAIN_SIGNATURES)):
+        started = time.perf_counter()
+        streamed(signatures, data)
+        whole = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        streamed(signatures, data, 1024 * 1024)
+        capped = (time.perf_counter() - started) * 1000
+        print(f"{name} streamed in 64KB chunks: {whole:.1f}ms, capped at 1MB: {capped:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
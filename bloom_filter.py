@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import math
+import os
+import time
+
+from disk_cache import DEFAULT_CACHE_ROOT
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.01
+DAY = 86400
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Membership tests may return false
+    positives at roughly error_rate once capacity items are added, never false negatives.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE, bits=None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def merge(self, other):
+        for i, byte in enumerate(other.bits):
+            self.bits[i] |= byte
+
+
+class RollingBloomFilter:
+    """
+    Bloom filters persisted under <root>/<namespace>/, one per day. A name is
+    seen if any filter inside the freshness window holds it; older days are deleted.
+    """
+
+    def __init__(self, namespace, window_days, root=None, capacity=DEFAULT_CAPACITY,
+                 error_rate=DEFAULT_ERROR_RATE):
+        self.path = os.path.join(root or DEFAULT_CACHE_ROOT, namespace)
+        self.window_days = window_days
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.today = int(time.time() // DAY)
+        os.makedirs(self.path, exist_ok=True)
+        self.filters = {}
+        for day in range(self.today - window_days + 1, self.today + 1):
+            loaded = self._load(day)
+            if loaded is not None:
+                self.filters[day] = loaded
+        self.filters.setdefault(self.today, self._new())
+        self._prune()
+
+    def _new(self, bits=None):
+        return BloomFilter(self.capacity, self.error_rate, bits)
+
+    def _file(self, day):
+        return os.path.join(self.path, f"{day}.bloom")
+
+    def _load(self, day):
+        try:
+            with open(self._file(day), "rb") as f:
+                bits = f.read()
+        except OSError:
+            return None
+        bloom = self._new()
+        # A file written with different sizing cannot be combined with this one
+        return self._new(bits) if len(bits) == len(bloom.bits) else None
+
+    def _prune(self):
+        for entry in os.listdir(self.path):
+            day = entry.split(".")[0]
+            if entry.endswith(".bloom") and day.isdigit() and int(day) <= self.today - self.window_days:
+                try:
+                    os.remove(os.path.join(self.path, entry))
+                except OSError:
+                    pass
+
+    def add(self, item):
+        self.filters[self.today].add(item)
+
+    def __contains__(self, item):
+        return any(item in bloom for bloom in self.filters.values())
+
+    def save(self):
+        current = self.filters[self.today]
+        # Other processes may have added names since we loaded; bits are only ever set, so OR them in
+        on_disk = self._load(self.today)
+        if on_disk is not None:
+            current.merge(on_disk)
+        path = self._file(self.today)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(current.bits)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"Could not write Bloom filter {path}: {e}")
@@ -1,84 +1,224 @@
-
-import time
-import requests
-import logging
-from requests.exceptions import SSLError, Timeout, ConnectionError
-
-def request_with_retries(url, retries=2, delay=0.25, verbose=False):
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.get(url, timeout=5)
-            return response.status_code
-        except SSLError:
-            logging.warning(f"SSL Error (skipped retry): {url}")
-            return "ssl_error"
-        except Timeout:
-            logging.warning(f"Timeout (attempt {attempt}): {url}")
-        except ConnectionError:
-            logging.warning(f"Connection error (attempt {attempt}): {url}")
-        except Exception as e:
-            logging.warning(f"Other error (attempt {attempt}): {e}")
-        if verbose:
-            time.sleep(delay)
-    return None
-
-import requests
+import asyncio
+import hashlib
 import logging
+import re
+from itertools import islice
+from rich.console import Console
+from utils import ask_fast_mode
+from bloom_filter import RollingBloomFilter
+from dns_resolution_module import resolve_all
+from http_engine import open_session, fetch
+from session_store import load_progress, save_progress
+
+READS = ["root_domain", "company_name", "subdomains"]
+WRITES = ["bucket_audit"]
+
+# "url" is probed with HEAD; "dns" names a host that only exists when the bucket
+# or account does. S3 and GCS answer for any name, so only Azure can be pre-filtered.
+# "missing" lists the statuses that mean no such bucket (a HEAD on a missing S3
+# bucket is its NoSuchBucket); "invalid" those rejecting the name outright. Azure has
+# neither: its probe names a container, and a 404 there only says the container is
+# private or named differently, so an Azure name is ruled out by NXDOMAIN alone.
+PROVIDERS = {
+    "aws": {"url": "https://{name}.s3.amazonaws.com", "dns": None, "missing": (404,), "invalid": (400,)},
+    "gcp": {"url": "https://storage.googleapis.com/{name}", "dns": None, "missing": (404,), "invalid": (400,)},
+    "azure": {"url": "https://{name}.blob.core.windows.net/{name}?restype=container",
+              "dns": "{name}.blob.core.windows.net", "missing": (), "invalid": ()},
+}
+DEFAULT_PROVIDER_CONCURRENCY = 20
+DEFAULT_BUCKET_TIMEOUT = 5
+FAST_MODE_LIMIT = 100
+PROGRESS_CHUNK = 200
+RETRIES = 2
+DEFAULT_SEEN_DAYS = 30
+# Lowest common denominator of the providers' naming rules
+VALID_NAME = re.compile(r"^[a-z0-9][a-z0-9.-]{1,61}[a-z0-9]$")
 
-DEFAULT_WORDS = [
-    "prod", "dev", "test", "backup", "logs", "assets", "data", "reports", "docs",
-    "vpn", "configs", "internal", "external", "shared", "restricted", "outage",
-    "iot", "archive", "dump", "nerc", "cip", "crew", "admin", "incident", "vpn"
+# Ordered by how often they name real buckets; the first group is tried before the rest
+HIGH_VALUE_WORDS = ["prod", "backup", "nerc", "cip", "data", "logs", "archive", "dump", "configs", "internal"]
+DEFAULT_WORDS = HIGH_VALUE_WORDS + [
+    "dev", "test", "assets", "reports", "docs", "vpn", "external", "shared", "restricted",
+    "outage", "iot", "crew", "admin", "incident"
 ]
 
+def _label(text):
+    return re.sub(r"[^a-z0-9]+", "-", (text or "").lower()).strip("-")
+
 def generate_bucket_candidates(domain, company=None, subdomains=None):
-    base = domain.split('.')[0]
-    labels = set()
+    """
+    Lazily yield valid, unique bucket names, most likely first: the root
+    label, company and domain on their own, then combined with the
+    high-value words, then the remaining words, and subdomain labels last.
+    """
+    seen = set()
 
-    if subdomains:
-        for sub in subdomains:
-            label = sub.split('.')[0]
-            labels.add(label.lower())
+    def fresh(names):
+        for name in names:
+            if name not in seen and VALID_NAME.match(name):
+                seen.add(name)
+                yield name
 
-    parts = [base, domain, company] if company else [base, domain]
-    parts.extend(labels)
-    parts = set(filter(None, parts))
+    company_label = _label(company)
+    roots = [r for r in dict.fromkeys([_label(domain.split(".")[0]), company_label,
+                                       company_label.replace("-", ""), domain.lower()]) if r]
+    yield from fresh(roots)
+    for word in DEFAULT_WORDS:
+        yield from fresh(n for root in roots for n in (f"{root}-{word}", f"{word}-{root}"))
 
-    candidates = set()
+    labels = [l for l in dict.fromkeys(_label(sub.split(".")[0]) for sub in subdomains or []) if l]
+    yield from fresh(labels)
     for word in DEFAULT_WORDS:
-        for base in parts:
-            candidates.add(f"{base}-{word}")
-            candidates.add(f"{word}-{base}")
-            candidates.add(base)
-    return sorted(candidates)
+        yield from fresh(n for label in labels for n in (f"{label}-{word}", f"{word}-{label}"))
+
+def provider_settings(shared_data):
+    """
+    Provider table with any overrides from shared_data. "bucket_endpoints" maps a
+    provider to a URL template (e.g. a local stand-in); an overridden provider
+    skips the DNS pre-filter unless "bucket_dns" gives it a hostname template too.
+    """
+    endpoints = shared_data.get("bucket_endpoints") or {}
+    dns_names = shared_data.get("bucket_dns") or {}
+    providers = {}
+    for provider, spec in PROVIDERS.items():
+        if provider in endpoints:
+            spec = dict(spec, url=endpoints[provider], dns=dns_names.get(provider))
+        elif provider in dns_names:
+            spec = dict(spec, dns=dns_names[provider])
+        providers[provider] = spec
+    return providers
+
+def seen_filters(shared_data, providers):
+    """
+    Per-provider record of names found not to exist within the last
+    bucket_seen_days (0 disables it). Stand-in endpoints get their own filters.
+    """
+    days = int(shared_data.get("bucket_seen_days", DEFAULT_SEEN_DAYS))
+    if days <= 0:
+        return {}
+    filters = {}
+    for provider, spec in providers.items():
+        namespace = provider
+        if spec["url"] != PROVIDERS[provider]["url"]:
+            namespace += "-" + hashlib.sha1(spec["url"].encode("utf-8")).hexdigest()[:8]
+        filters[provider] = RollingBloomFilter(f"bucket_seen/{namespace}", days)
+    return filters
 
-# replaced with request_with_retries
+def classify(response, spec):
+    if "error" in response:
+        return response["error"]
+    status = response["status_code"]
+    if status == 200:
+        return "public-readable"
+    if status in spec["missing"]:
+        return "nonexistent"
+    if status in spec["invalid"]:
+        # S3 and GCS reject names that could never be a bucket; nothing to remember them by
+        return "invalid-name"
+    # 401/403, region redirects and Azure container 404s all mean the name is taken but not listable here
+    return "private"
+
+async def _probe_all(jobs, concurrency, timeout):
+    sems = {provider: asyncio.Semaphore(concurrency) for provider in PROVIDERS}
+    # Every GCS probe hits the same host, so the per-provider semaphores are the only per-host bound
+    async with open_session(concurrency * len(PROVIDERS), per_host=0) as session:
+
+        async def probe(name, provider, url):
+            async with sems[provider]:
+                for attempt in range(RETRIES):
+                    response = await fetch(session, url, method="HEAD", timeout=timeout, allow_redirects=False)
+                    if response.get("error") not in ("timeout", "connection_error"):
+                        break
+                    logging.debug(f"{response['error']} (attempt {attempt + 1}): {url}")
+            return name, provider, response
+
+        return await asyncio.gather(*(probe(*job) for job in jobs))
+
+def audit_buckets(names, shared_data, seen=None):
+    """
+    Check every candidate name against each provider. Pairs already in
+    the seen filters, and names whose DNS pre-filter host answers NXDOMAIN,
+    are marked nonexistent without an HTTP request; the rest, including
+    lookups that timed out or failed, get one HEAD each, bounded per
+    provider. Returns {name: {provider: status}}.
+    """
+    providers = provider_settings(shared_data)
+    seen = seen or {}
+    results = {name: dict.fromkeys(providers) for name in names}
+    for name in names:
+        for provider in seen:
+            if name in seen[provider]:
+                results[name][provider] = "nonexistent"
+
+    dns_hosts = {(name, p): spec["dns"].format(name=name)
+                 for name in names for p, spec in providers.items()
+                 if spec["dns"] and results[name][p] is None}
+    records = resolve_all(dns_hosts.values(), shared_data) if dns_hosts else {}
+    jobs = []
+    # (name, provider) pairs this run proved missing, by NXDOMAIN or a provider's "no such bucket"
+    missing = set()
+    for name in names:
+        for provider, spec in providers.items():
+            if results[name][provider] is not None:
+                continue
+            host = dns_hosts.get((name, provider))
+            record = records.get(host) if host else None
+            # Only NXDOMAIN proves the account is missing; a timeout or SERVFAIL says nothing
+            if record and record.get("failure") == "nxdomain":
+                results[name][provider] = "nonexistent"
+                missing.add((name, provider))
+            else:
+                jobs.append((name, provider, spec["url"].format(name=name)))
+
+    concurrency = int(shared_data.get("bucket_concurrency", DEFAULT_PROVIDER_CONCURRENCY))
+    timeout = float(shared_data.get("bucket_timeout", DEFAULT_BUCKET_TIMEOUT))
+    logging.info(f"Probing {len(jobs)} bucket URLs ({len(missing)} ruled out by DNS, "
+                 f"{len(names) * len(providers) - len(jobs) - len(missing)} checked recently, {concurrency} per provider)")
+    if jobs:
+        for name, provider, response in asyncio.run(_probe_all(jobs, concurrency, timeout)):
+            status = classify(response, providers[provider])
+            results[name][provider] = status
+            if status == "nonexistent":
+                missing.add((name, provider))
+
+    # Only proven misses from this run are remembered: buckets that exist are findings and get
+    # re-checked every run, failed or ambiguous probes prove nothing, and names skipped as seen
+    # keep their original date
+    for name, provider in missing:
+        if provider in seen:
+            seen[provider].add(name)
+    for bloom in seen.values():
+        bloom.save()
+    return results
 
 def run(shared_data):
 
     # Fast/Verbose Mode Prompt
+    console = Console()
     console.print("\n[bold cyan]Choose Bucket Audit Mode:[/bold cyan]")
-    fast_mode = Prompt.ask("Run in fast mode? (limits checks to 100)", choices=["y", "n"], default="y") == "y"
-    verbose_mode = not fast_mode
+    fast_mode = ask_fast_mode(shared_data, f"Run in fast mode? (limits checks to {FAST_MODE_LIMIT})")
     logging.info("Running Public Cloud Bucket Audit (No Credentials)")
     domain = shared_data.get("root_domain", "")
     company = shared_data.get("company_name", "")
     subdomains = shared_data.get("subdomains", [])
 
-    bucket_names = generate_bucket_candidates(domain, company, subdomains)
+    # Buckets checked before an interruption are restored, not probed again
+    results = load_progress(shared_data, __name__)
+    seen = seen_filters(shared_data, provider_settings(shared_data))
 
-    results = {}
-    for i, name in enumerate(bucket_names):
-        if fast_mode and i >= 100:
+    # Names every provider already ruled out recently don't count against the budget
+    remaining = (name for name in generate_bucket_candidates(domain, company, subdomains)
+                 if name not in results and not (seen and all(name in bloom for bloom in seen.values())))
+    if fast_mode:
+        remaining = islice(remaining, max(0, FAST_MODE_LIMIT - len(results)))
+    while True:
+        chunk = list(islice(remaining, PROGRESS_CHUNK))
+        if not chunk:
             break
-        result = {
-            "aws": request_with_retries(f"https://{name}.s3.amazonaws.com", delay=0.25, verbose=verbose_mode),
-            "gcp": check_bucket_url(f"https://storage.googleapis.com/{name}"),
-            "azure": check_bucket_url(f"https://{name}.blob.core.windows.net")
-        }
-        results[name] = result
-        if "public-readable" in result.values():
-            logging.warning(f"🟢 Publicly accessible bucket: {name} => {result}")
+        for name, result in audit_buckets(chunk, shared_data, seen).items():
+            results[name] = result
+            save_progress(shared_data, __name__, name, result)
+            if "public-readable" in result.values():
+                logging.warning(f"🟢 Publicly accessible bucket: {name} => {result}")
 
     shared_data["bucket_audit"] = results
     return results
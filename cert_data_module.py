@@ -1,13 +1,24 @@
-
 import ssl
 import socket
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import prefetch
+from incremental import probe_targets, carry_forward
+
+READS = ["subdomains", "incremental_plan"]
+WRITES = ["cert_data"]
+
+DEFAULT_CERT_WORKERS = 64
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_HANDSHAKE_TIMEOUT = 5
 
-def get_cert_info(domain, port=443):
+def get_cert_info(domain, port=443, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                  handshake_timeout=DEFAULT_HANDSHAKE_TIMEOUT):
     context = ssl.create_default_context()
     try:
-        with socket.create_connection((domain, port), timeout=5) as sock:
+        with socket.create_connection((domain, port), timeout=connect_timeout) as sock:
+            sock.settimeout(handshake_timeout)
             with context.wrap_socket(sock, server_hostname=domain) as ssock:
                 cert = ssock.getpeercert()
                 return {
@@ -22,15 +33,58 @@ def get_cert_info(domain, port=443):
         logging.warning(f"Could not retrieve cert for {domain}: {e}")
         return None
 
+def harvest_certs(domains, workers=DEFAULT_CERT_WORKERS, port=443,
+                  connect_timeout=DEFAULT_CONNECT_TIMEOUT, handshake_timeout=DEFAULT_HANDSHAKE_TIMEOUT):
+    """
+    Fetch certificates for many hosts in parallel. Each handshake is still a
+    plain blocking socket, so a dead host only ties up one worker.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            domain: pool.submit(get_cert_info, domain, port, connect_timeout, handshake_timeout)
+            for domain in domains
+        }
+        for domain, future in futures.items():
+            cert_info = future.result()
+            if cert_info:
+                results[domain] = cert_info
+    return results
+
+def _harvest(domains, shared_data):
+    return harvest_certs(
+        domains,
+        workers=int(shared_data.get("cert_workers", DEFAULT_CERT_WORKERS)),
+        connect_timeout=float(shared_data.get("cert_connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+        handshake_timeout=float(shared_data.get("cert_handshake_timeout", DEFAULT_HANDSHAKE_TIMEOUT))
+    )
+
+def prefetch_certs(hosts, shared_data):
+    """
+    PREFETCH hook: harvest certificates while enumeration is still running.
+    Incremental runs only re-probe the hosts their plan picks, so they skip it.
+    """
+    if shared_data.get("incremental_mode"):
+        return
+    found = _harvest(hosts, shared_data)
+    shared_data.setdefault("_prefetched_certs", {}).update({h: found.get(h) for h in hosts})
+
+PREFETCH = prefetch_certs
+
 def run(shared_data):
     logging.info("Running Certificate Data Module")
     subdomains = shared_data.get("subdomains", [])
-    results = {}
 
-    for domain in subdomains:
-        cert_info = get_cert_info(domain)
-        if cert_info:
-            results[domain] = cert_info
+    targets = probe_targets(shared_data, subdomains)
+    prefetch.wait(shared_data, prefetch_certs)
+    prefetched = shared_data.get("_prefetched_certs") or {}
+    results = {h: prefetched[h] for h in targets if prefetched.get(h)}
+    remaining = [h for h in targets if h not in prefetched]
+    if prefetched:
+        logging.info(f"{len(targets) - len(remaining)} certificates checked during enumeration, "
+                     f"harvesting {len(remaining)} more")
+    results.update(_harvest(remaining, shared_data))
 
+    results = carry_forward(shared_data, "cert_data", results)
     shared_data["cert_data"] = results
     return results
@@ -1,7 +1,13 @@
 
-import requests
 import logging
 import re
+from http_engine import fetch_all, prefetch_pages
+from incremental import probe_targets, carry_forward
+
+READS = ["subdomains", "cert_domains", "incremental_plan"]
+WRITES = ["cloud_fingerprint"]
+# Pages are fetched into the session cache while enumeration runs
+PREFETCH = prefetch_pages
 
 CLOUD_PATTERNS = {
     "AWS": ["s3.amazonaws.com", "cloudfront.net", "amazonaws.com"],
@@ -34,21 +40,25 @@ def run(shared_data):
         logging.warning("No subdomains provided to Cloud Detection Module")
         return {}
 
+    subdomains = probe_targets(shared_data, subdomains)
     cloud_results = {}
 
+    responses = fetch_all([f"https://{domain}" for domain in subdomains], shared_data,
+                          timeout=5, allow_redirects=True)
+
     for domain in subdomains:
-        url = f"https://{domain}"
-        try:
-            r = requests.get(url, timeout=5, allow_redirects=True)
-            stack = detect_cloud_from_headers(r.headers)
-            cloud_results[domain] = {
-                "status_code": r.status_code,
-                "cloud_providers": stack,
-                "headers": dict(r.headers)
-            }
-            logging.info(f"{domain}: {stack}")
-        except requests.RequestException as e:
-            logging.warning(f"Request failed for {domain}: {e}")
+        r = responses.get(f"https://{domain}", {})
+        if "error" in r:
+            logging.warning(f"Request failed for {domain}: {r.get('detail', r['error'])}")
+            continue
+        stack = detect_cloud_from_headers(r["headers"])
+        cloud_results[domain] = {
+            "status_code": r["status_code"],
+            "cloud_providers": stack,
+            "headers": r["headers"]
+        }
+        logging.info(f"{domain}: {stack}")
 
+    cloud_results = carry_forward(shared_data, "cloud_fingerprint", cloud_results)
     shared_data["cloud_fingerprint"] = cloud_results
     return cloud_results
\ No newline at end of file
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_INDEX_PATH = os.getenv("DEEP_RECON_CVE_INDEX", os.path.join("data", "cve_index.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    id TEXT PRIMARY KEY,
+    published TEXT,
+    score REAL,
+    severity TEXT,
+    vector TEXT,
+    description TEXT,
+    vendors TEXT,
+    products TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cves_score ON cves(score);
+CREATE TABLE IF NOT EXISTS cve_cpes (
+    cve_id TEXT,
+    vendor TEXT,
+    product TEXT,
+    version TEXT,
+    PRIMARY KEY (vendor, product, cve_id, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cpes_cve ON cve_cpes(cve_id);
+-- Inverted index over vendor, product and description words; the text itself lives in cves
+CREATE VIRTUAL TABLE IF NOT EXISTS cve_text USING fts5(
+    vendors, products, description, content='cves', content_rowid='rowid'
+);
+CREATE TABLE IF NOT EXISTS feeds (
+    path TEXT PRIMARY KEY,
+    imported_at REAL,
+    cves INTEGER
+);
+"""
+
+# Newest CVSS version first; v2 entries keep baseSeverity outside cvssData
+METRIC_KEYS = ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]
+
+
+def _cvss_v2_severity(score):
+    if score is None:
+        return None
+    return "HIGH" if score >= 7 else "MEDIUM" if score >= 4 else "LOW"
+
+
+def parse_cpe(uri):
+    parts = uri.split(":")
+    if len(parts) < 6:
+        return None
+    vendor, product, version = parts[3], parts[4], parts[5]
+    return vendor, product, "" if version in ("*", "-") else version
+
+
+def _walk_nodes(nodes):
+    for node in nodes or []:
+        yield from node.get("cpeMatch", []) or node.get("cpe_match", [])
+        yield from _walk_nodes(node.get("children"))
+
+
+def _record_v2(cve):
+    """NVD API 2.0 / 2.0 feed item."""
+    description = next((d["value"] for d in cve.get("descriptions", []) if d.get("lang") == "en"), "")
+    score = severity = vector = None
+    metrics = cve.get("metrics", {})
+    for key in METRIC_KEYS:
+        if metrics.get(key):
+            metric = metrics[key][0]
+            data = metric.get("cvssData", {})
+            score, vector = data.get("baseScore"), data.get("vectorString")
+            severity = data.get("baseSeverity") or metric.get("baseSeverity") or _cvss_v2_severity(score)
+            break
+    cpes = [m.get("criteria", "") for config in cve.get("configurations", [])
+            for m in _walk_nodes(config.get("nodes")) if m.get("vulnerable", True)]
+    return cve["id"], cve.get("published"), score, severity, vector, description, cpes
+
+
+def _record_v1(item):
+    """Legacy 1.1 JSON feed item."""
+    meta = item["cve"]
+    description = next((d["value"] for d in meta.get("description", {}).get("description_data", [])
+                        if d.get("lang") == "en"), "")
+    impact = item.get("impact", {})
+    score = severity = vector = None
+    if "baseMetricV3" in impact:
+        data = impact["baseMetricV3"]["cvssV3"]
+        score, severity, vector = data.get("baseScore"), data.get("baseSeverity"), data.get("vectorString")
+    elif "baseMetricV2" in impact:
+        data = impact["baseMetricV2"]
+        score = data["cvssV2"].get("baseScore")
+        severity, vector = data.get("severity"), data["cvssV2"].get("vectorString")
+    cpes = [m.get("cpe23Uri", "") for m in _walk_nodes(item.get("configurations", {}).get("nodes"))
+            if m.get("vulnerable", True)]
+    return meta["CVE_data_meta"]["ID"], item.get("publishedDate"), score, severity, vector, description, cpes
+
+
+def iter_feed(path):
+    """Yield parsed CVE records from one NVD JSON feed file (.json or .json.gz, 1.1 or 2.0 schema)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        feed = json.load(f)
+    if "vulnerabilities" in feed:
+        for entry in feed["vulnerabilities"]:
+            yield _record_v2(entry["cve"])
+    else:
+        for item in feed.get("CVE_Items", []):
+            yield _record_v1(item)
+
+
+def _to_dict(row, cpes=None):
+    cve_id, published, score, severity, vector, description = row[:6]
+    record = {
+        "id": cve_id,
+        "published": published,
+        "score": score,
+        "severity": severity,
+        "vector": vector,
+        # Same shape as the NVD API, so callers can use either source
+        "descriptions": [{"lang": "en", "value": description}],
+    }
+    if cpes is not None:
+        record["cpes"] = cpes
+    return record
+
+
+class CVEIndex:
+    """
+    Local SQLite index of NVD data: CVSS score, severity and affected
+    vendor/product/version per CVE, plus an FTS5 inverted index over vendors,
+    products and description words for offline keyword search.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def import_feed(self, path):
+        count = 0
+        with self._lock, self.conn:
+            for cve_id, published, score, severity, vector, description, cpes in iter_feed(path):
+                parsed = sorted({c for c in (parse_cpe(uri) for uri in cpes) if c})
+                vendors = " ".join(sorted({v for v, _, _ in parsed}))
+                products = " ".join(sorted({p.replace("_", " ") for _, p, _ in parsed}))
+                self.conn.execute("INSERT OR REPLACE INTO cves VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (cve_id, published, score, severity and severity.upper(), vector,
+                                   description, vendors, products))
+                self.conn.execute("DELETE FROM cve_cpes WHERE cve_id = ?", (cve_id,))
+                self.conn.executemany("INSERT OR IGNORE INTO cve_cpes VALUES (?, ?, ?, ?)",
+                                      [(cve_id, v, p, ver) for v, p, ver in parsed])
+                count += 1
+            self.conn.execute("INSERT OR REPLACE INTO feeds VALUES (?, ?, ?)",
+                              (os.path.abspath(path), time.time(), count))
+        return count
+
+    def import_feeds(self, paths):
+        total = 0
+        for path in paths:
+            started = time.monotonic()
+            count = self.import_feed(path)
+            total += count
+            logging.info(f"Imported {count} CVEs from {path} in {time.monotonic() - started:.1f}s")
+        # Replaced rows get new rowids, so the full-text index is rebuilt once at the end
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO cve_text(cve_text) VALUES ('rebuild')")
+        return total
+
+    def _cpes(self, cve_ids):
+        placeholders = ",".join("?" * len(cve_ids))
+        rows = self.conn.execute(f"SELECT cve_id, vendor, product, version FROM cve_cpes "
+                                 f"WHERE cve_id IN ({placeholders})", list(cve_ids)).fetchall()
+        cpes = {}
+        for cve_id, vendor, product, version in rows:
+            cpes.setdefault(cve_id, []).append({"vendor": vendor, "product": product, "version": version})
+        return cpes
+
+    def enrich(self, cve_ids):
+        """Return {cve_id: record} for every id present in the index."""
+        cve_ids = list(dict.fromkeys(cve_ids))
+        results = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(cve_ids), 500):
+                chunk = cve_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(f"SELECT id, published, score, severity, vector, description FROM cves "
+                                         f"WHERE id IN ({placeholders})", chunk).fetchall()
+                cpes = self._cpes(chunk)
+                for row in rows:
+                    results[row[0]] = _to_dict(row, cpes.get(row[0], []))
+        return results
+
+    def get(self, cve_id):
+        return self.enrich([cve_id]).get(cve_id)
+
+    def search(self, keyword, limit=3, column=None):
+        """
+        Highest-scoring CVEs whose vendors, products or description contain
+        keyword as a phrase. column limits the match to "vendors", "products"
+        or "description".
+        """
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        query = f"{column} : {phrase}" if column else phrase
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT c.id, c.published, c.score, c.severity, c.vector, c.description FROM cve_text "
+                "JOIN cves c ON c.rowid = cve_text.rowid WHERE cve_text MATCH ? "
+                "ORDER BY c.score IS NULL, c.score DESC LIMIT ?", (query, limit)).fetchall()
+        return [_to_dict(row) for row in rows]
+
+    def by_product(self, vendor, product=None, limit=50):
+        sql = ("SELECT DISTINCT c.id, c.published, c.score, c.severity, c.vector, c.description FROM cve_cpes p "
+               "JOIN cves c ON c.id = p.cve_id WHERE p.vendor = ?")
+        params = [vendor.lower()]
+        if product:
+            sql += " AND p.product = ?"
+            params.append(product.lower().replace(" ", "_"))
+        sql += " ORDER BY c.score IS NULL, c.score DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [_to_dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def max_score(self, cve_ids):
+        scores = [r["score"] for r in self.enrich(cve_ids).values() if r["score"] is not None]
+        return max(scores) if scores else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cves": self.conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0],
+                "feeds": self.conn.execute("SELECT COUNT(*) FROM feeds").fetchone()[0],
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(shared_data=None):
+    """The local CVE index if one has been imported, otherwise None."""
+    path = (shared_data or {}).get("cve_index") or DEFAULT_INDEX_PATH
+    if not os.path.exists(path):
+        return None
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = CVEIndex(path)
+        return _indexes[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the offline CVE index from NVD JSON feeds.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"index file (default {DEFAULT_INDEX_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="import NVD JSON feed files (.json or .json.gz)")
+    importer.add_argument("feeds", nargs="+")
+    search = sub.add_parser("search", help="keyword search, highest CVSS first")
+    search.add_argument("keyword")
+    search.add_argument("--limit", type=int, default=10)
+    show = sub.add_parser("show", help="print one CVE")
+    show.add_argument("cve_id")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+
+    index = CVEIndex(args.index)
+    if args.command == "import":
+        total = index.import_feeds(args.feeds)
+        print(f"Imported {total} CVEs; index now holds {index.stats()['cves']} CVEs ({args.index})")
+    elif args.command == "search":
+        for cve in index.search(args.keyword, args.limit):
+            print(f"{cve['id']}  {cve['score'] or '-':>4}  {cve['severity'] or '-':<8} "
+                  f"{cve['descriptions'][0]['value'][:100]}")
+    else:
+        print(json.dumps(index.get(args.cve_id.upper()), indent=2))
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,13 @@ import os
 import sys
 import logging
 import json
+from datetime import datetime
 from rich.console import Console
 from rich.prompt import Prompt
 from reporting_module import generate_reports
+from http_engine import cache_summary
+from pipeline import ALL_STAGES, SharedData, run_pipeline, format_critical_path
+from session_store import SessionStore, start_session, resume_session, checkpoint, is_complete
 
 # Load recon modules (ensure all accept shared_data and return results into it)
 from subdomain_enumeration import run as run_subdomains
@@ -111,8 +115,27 @@ def run_module(name, func, shared_data):
     except Exception as e:
         console.print(f"[red]Error in {name}: {e}[/red]")
     else:
+        checkpoint(shared_data, func)
         console.print(f"[green]{name} complete. Results saved to shared_data.[/green]")
 
+def choose_session_to_resume(store, shared_data):
+    sessions = store.list_sessions(limit=10)
+    if not sessions:
+        return False
+    console.print("\n[bold cyan]-- Saved Sessions --[/bold cyan]")
+    for session_id, root_domain, updated_at, modules_done in sessions:
+        updated = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M")
+        console.print(f"{session_id}  {root_domain}  ({modules_done} modules done, last saved {updated})")
+    session_id = Prompt.ask("Session ID to resume (leave blank for a new session)", default="").strip()
+    if not session_id:
+        return False
+    if not resume_session(shared_data, session_id, store):
+        console.print(f"[red]No session {session_id}; starting a new one.[/red]")
+        return False
+    console.print(f"[green]Resumed {session_id} for {shared_data.get('root_domain')}: "
+                  f"{len(shared_data['_completed_modules'])} modules already complete.[/green]")
+    return True
+
 def recon_menu(shared_data):
     fast_mode = Prompt.ask("Run all modules in fast mode by default?", choices=["y", "n"], default="y") == "y"
     shared_data["fast_mode"] = fast_mode
@@ -164,16 +187,21 @@ def recon_menu(shared_data):
         elif choice == "13":
             run_module("Screenshot Capture", run_screens, shared_data)
         elif choice == "14":
-            for name, func in [
-                ("Subdomain Enumeration", run_subdomains), ("Certificate Analysis", run_cert),
-                ("Grid IP Harvester", run_grid_harvest), ("GitHub Search", run_github),
-                ("Shodan Scan", run_shodan), ("Cloud Detection", run_cloud),
-                ("Wayback JS", run_wayback), ("Error Page Extraction", run_errors),
-                ("Path Fuzzing", run_paths), ("Supply Chain Analysis", run_supply),
-                ("Bucket Audit", run_buckets), ("ICS Exposure Detection", run_ics),
-                ("Screenshot Capture", run_screens)
-            ]:
-                run_module(name, func, shared_data)
+            # Independent modules run side by side, so per-module prompts are
+            # skipped in favour of the session-wide fast mode chosen above.
+            stages = [(name, module) for name, module in ALL_STAGES if not is_complete(shared_data, module)]
+            skipped = len(ALL_STAGES) - len(stages)
+            if skipped:
+                console.print(f"[yellow]Skipping {skipped} modules already completed in this session.[/yellow]")
+            shared_data["non_interactive"] = True
+            try:
+                durations, path, total = run_pipeline(stages, shared_data, run_module)
+            finally:
+                shared_data.pop("non_interactive", None)
+            console.print(f"[cyan]{format_critical_path(path, durations, total)}[/cyan]")
+            summary = cache_summary(shared_data)
+            if summary:
+                console.print(f"[cyan]{summary}[/cyan]")
         elif choice == "15":
             generate_reports(shared_data)
         elif choice == "16":
@@ -194,6 +222,9 @@ def recon_menu(shared_data):
                     selected = reports[int(idx)-1]
                     console.print(f"[green]Selected:[/green] {selected.resolve()}")
         elif choice == "0":
+            summary = cache_summary(shared_data)
+            if summary:
+                console.print(f"[cyan]{summary}[/cyan]")
             console.print("\n[bold red]Exiting Deep Recon.[/bold red]")
             break
         else:
@@ -202,14 +233,27 @@ def recon_menu(shared_data):
 def main():
     print_banner()
     console.print("[bold cyan]Welcome to Deep_Recon[/bold cyan]")
-    shared_data = {}
+    shared_data = SharedData()
     if Prompt.ask("Configure API keys?", choices=["yes", "no", "keep"], default="yes") == "yes":
         configure_api_keys()
+    store = SessionStore()
+    if choose_session_to_resume(store, shared_data):
+        recon_menu(shared_data)
+        return
     shared_data["root_domain"] = Prompt.ask("Enter root domain")
     for key in ["company_name", "organization_name", "origin_registrant", "prefix_registrant"]:
         shared_data[key] = Prompt.ask(f"{key.replace('_', ' ').title()} (optional)", default="")
     shared_data["report_filename"] = Prompt.ask("Custom report filename (optional)", default="deep_recon_report")
+    if store.list_sessions(root_domain=shared_data["root_domain"], limit=1):
+        shared_data["incremental_mode"] = Prompt.ask(
+            "A previous session exists for this domain. Only re-probe new or changed hosts?",
+            choices=["y", "n"], default="y") == "y"
+    start_session(shared_data, store)
+    console.print(f"[cyan]Session ID: {shared_data['session_id']} (checkpointed to {store.path})[/cyan]")
     recon_menu(shared_data)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from batch_runner import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
     main()
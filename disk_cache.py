@@ -0,0 +1,47 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+DEFAULT_CACHE_ROOT = os.getenv("DEEP_RECON_CACHE_DIR", "cache")
+
+
+class DiskCache:
+    """
+    JSON-file cache for API responses. One file per key under
+    <root>/<namespace>/, expired entries are ignored once older than ttl seconds.
+    """
+
+    def __init__(self, namespace, ttl, root=None):
+        self.ttl = ttl
+        self.path = os.path.join(root or DEFAULT_CACHE_ROOT, namespace)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get_entry(self, key, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            with open(self._file(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl is not None and time.time() - entry.get("stored_at", 0) > ttl:
+            return None
+        return entry
+
+    def get(self, key, ttl=None):
+        entry = self.get_entry(key, ttl)
+        return entry["value"] if entry else None
+
+    def set(self, key, value, **extra):
+        path = self._file(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"key": key, "stored_at": time.time(), "value": value, **extra}, f, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"Could not write cache entry {path}: {e}")
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import threading
+import time
+import dns.asyncresolver
+import dns.exception
+import dns.name
+import dns.rdatatype
+import dns.resolver
+import prefetch
+
+READS = ["subdomains"]
+WRITES = ["dns_records", "ip_index"]
+
+DEFAULT_DNS_CONCURRENCY = 100
+DEFAULT_DNS_TIMEOUT = 5
+NEGATIVE_TTL = 300
+# Why a lookup produced no addresses, most conclusive first. Only an NXDOMAIN
+# proves the name does not exist; timeouts and SERVFAILs are not cached.
+FAILURE_ORDER = ["nxdomain", "timeout", "servfail", "noanswer"]
+TRANSIENT_FAILURES = {"timeout", "servfail"}
+
+_records_lock = threading.Lock()
+
+
+def _cname_chain(answer):
+    if answer is None:
+        return []
+    chain = []
+    for rrset in answer.response.answer:
+        if rrset.rdtype == dns.rdatatype.CNAME:
+            chain.extend(str(r.target).rstrip(".") for r in rrset)
+    return chain
+
+
+async def _query(resolver, host, rdtype):
+    """(answer, None) on success, else (None, failure reason)."""
+    try:
+        return await resolver.resolve(host, rdtype), None
+    except (dns.resolver.NXDOMAIN, dns.name.EmptyLabel, dns.name.LabelTooLong, dns.name.NameTooLong):
+        # A name that is not even valid cannot exist either
+        return None, "nxdomain"
+    except dns.resolver.NoAnswer:
+        return None, "noanswer"
+    except dns.resolver.NoNameservers:
+        # Every nameserver answered SERVFAIL or refused
+        return None, "servfail"
+    except dns.exception.Timeout:
+        return None, "timeout"
+
+
+async def resolve_host(resolver, host):
+    """
+    (record, ttl). A record without addresses carries "failure": nxdomain,
+    timeout, servfail or noanswer.
+    """
+    (a, a_failure), (aaaa, aaaa_failure) = await asyncio.gather(_query(resolver, host, "A"),
+                                                                 _query(resolver, host, "AAAA"))
+    # The usable lifetime is bounded by the shortest TTL anywhere in the CNAME chain
+    ttls = [rrset.ttl for ans in (a, aaaa) if ans is not None for rrset in ans.response.answer]
+    record = {
+        "a": [r.address for r in a] if a is not None else [],
+        "aaaa": [r.address for r in aaaa] if aaaa is not None else [],
+        "cname": _cname_chain(a) or _cname_chain(aaaa),
+    }
+    if ttls:
+        return record, min(ttls)
+    failures = {a_failure, aaaa_failure}
+    record["failure"] = next(f for f in FAILURE_ORDER if f in failures)
+    return record, (0 if record["failure"] in TRANSIENT_FAILURES else NEGATIVE_TTL)
+
+
+async def _resolve_all(hosts, concurrency, timeout, nameservers=None):
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = timeout
+    if nameservers:
+        resolver.nameservers = list(nameservers)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def bounded(host):
+        async with sem:
+            return host, await resolve_host(resolver, host)
+
+    return await asyncio.gather(*(bounded(h) for h in hosts))
+
+
+def resolve_all(hosts, shared_data):
+    """
+    Resolve hosts concurrently, reusing any cached answer whose TTL has not
+    yet expired. Returns {host: {"a": [...], "aaaa": [...], "cname": [...]}}.
+    """
+    cache = shared_data.setdefault("_dns_cache", {})
+    now = time.time()
+    results = {}
+    pending = []
+    for host in dict.fromkeys(h for h in hosts if h):
+        cached = cache.get(host)
+        if cached and cached[0] > now:
+            results[host] = cached[1]
+        else:
+            pending.append(host)
+
+    if pending:
+        concurrency = int(shared_data.get("dns_concurrency", DEFAULT_DNS_CONCURRENCY))
+        timeout = float(shared_data.get("dns_timeout", DEFAULT_DNS_TIMEOUT))
+        logging.info(f"Resolving {len(pending)} hosts ({len(results)} cached, {concurrency} in flight)")
+        resolved = asyncio.run(_resolve_all(pending, concurrency, timeout, shared_data.get("dns_nameservers")))
+        now = time.time()
+        for host, (record, ttl) in resolved:
+            cache[host] = (now + ttl, record)
+            results[host] = record
+    return results
+
+
+# Names are resolved while enumeration is still discovering them
+PREFETCH = resolve_all
+
+
+def build_ip_index(records):
+    index = {}
+    for host, record in records.items():
+        for ip in record["a"] + record["aaaa"]:
+            index.setdefault(ip, [])
+            if host not in index[ip]:
+                index[ip].append(host)
+    return index
+
+
+def ensure_resolved(shared_data, hosts=None):
+    """
+    Make sure every host has a DNS record in shared_data and return the
+    records for the requested hosts. Downstream modules call this instead
+    of resolving on their own.
+    """
+    hosts = list(hosts if hosts is not None else shared_data.get("subdomains", []))
+    # Let the prefetch finish rather than query the names it still holds a second time
+    prefetch.wait(shared_data, resolve_all)
+    resolved = resolve_all(hosts, shared_data)
+    with _records_lock:
+        records = shared_data.setdefault("dns_records", {})
+        records.update(resolved)
+        shared_data["ip_index"] = build_ip_index(records)
+        return {h: records[h] for h in hosts if h in records}
+
+
+def primary_ip(record):
+    if not record:
+        return None
+    addrs = record["a"] or record["aaaa"]
+    return addrs[0] if addrs else None
+
+
+def group_by_ip(records):
+    """Map each host's primary address to every host that shares it."""
+    groups = {}
+    for host, record in records.items():
+        ip = primary_ip(record)
+        if ip:
+            groups.setdefault(ip, []).append(host)
+        else:
+            logging.warning(f"Could not resolve {host} to IP")
+    return groups
+
+
+def run(shared_data):
+    logging.info("Running DNS Resolution Module")
+    subdomains = shared_data.get("subdomains", [])
+    if not subdomains:
+        logging.warning("No subdomains found in shared_data.")
+        return {}
+
+    records = ensure_resolved(shared_data, subdomains)
+    resolved = sum(1 for r in records.values() if primary_ip(r))
+    logging.info(f"Resolved {resolved}/{len(subdomains)} hosts to {len(shared_data['ip_index'])} unique IPs")
+    return records
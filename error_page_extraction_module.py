@@ -1,30 +1,32 @@
-import requests
-import re
 import logging
-from rich.prompt import Prompt
 from rich.console import Console
 import time
+from http_engine import fetch_all
+from signatures import SignatureSet, DEFAULT_SCAN_BYTES
+from utils import ask_fast_mode
+from incremental import probe_targets, carry_forward
 
-ERROR_PATTERNS = [
-    r"(?i)(?<=<!--).*?error.*?(?=-->)",
-    r"(?i)<title>.*?error.*?</title>",
-    r"(?i)exception.*?<br />",
-    r"(?i)\\berror [0-9]{3}\\b",
-    r"(?i)(stack trace|stacktrace)",
-    r"(?i)(SQL syntax|mysqli|pg_query|mysql_fetch|sql error|db error)"
-]
+READS = ["subdomains", "cert_domains", "incremental_plan"]
+WRITES = ["error_pages"]
+
+# Regex signatures and the literal each one cannot match without
+ERROR_PATTERNS = {
+    r"(?<=<!--).*?error.*?(?=-->)": ["error"],
+    r"<title>.*?error.*?</title>": ["error"],
+    r"exception.*?<br />": ["exception"],
+    r"\berror [0-9]{3}\b": ["error"],
+}
+ERROR_KEYWORDS = ["stack trace", "stacktrace", "sql syntax", "mysqli", "pg_query", "mysql_fetch", "sql error", "db error"]
+ERROR_SIGNATURES = SignatureSet(literals=ERROR_KEYWORDS, patterns={p: p for p in ERROR_PATTERNS},
+                                anchors=ERROR_PATTERNS, word_boundary=False)
 
 def extract_errors(html):
-    found = []
-    for pattern in ERROR_PATTERNS:
-        matches = re.findall(pattern, html, re.IGNORECASE)
-        found.extend(matches)
-    return list(set(found))
+    return list({text for _, text in ERROR_SIGNATURES.scan(html)})
 
 def run(shared_data):
     console = Console()
     console.print("\n[bold cyan]Choose Error Page Extraction Module.Py Mode:[/bold cyan]")
-    fast_mode = Prompt.ask("Run in fast mode? (limits to 150 items)", choices=["y", "n"], default="y") == "y"
+    fast_mode = ask_fast_mode(shared_data, "Run in fast mode? (limits to 150 items)")
     verbose_mode = not fast_mode
 
     subdomains = shared_data.get("subdomains") or shared_data.get("cert_domains") or []
@@ -32,6 +34,7 @@ def run(shared_data):
         logging.warning("No subdomains available. Consider running Subdomain or Cert modules first.")
         return
 
+    subdomains = probe_targets(shared_data, subdomains)
     if fast_mode:
         console.print("[yellow]Fast mode selected. Scanning only first 150 domains.[/yellow]")
         subdomains = subdomains[:150]
@@ -39,21 +42,25 @@ def run(shared_data):
     logging.info("Running Error Page Extraction Module")
     output = {}
 
+    # Bodies are matched as they stream in and never read past the byte cap
+    max_body = int(shared_data.get("error_scan_bytes", DEFAULT_SCAN_BYTES))
+    responses = fetch_all([f"https://{domain}" for domain in subdomains], shared_data, timeout=5,
+                          max_body=max_body, scan=ERROR_SIGNATURES)
+
     for domain in subdomains:
-        url = f"https://{domain}"
-        try:
-            r = requests.get(url, timeout=5)
-            if r.status_code >= 400 or "error" in r.text.lower():
-                errors = extract_errors(r.text)
-                if errors:
-                    output[domain] = errors
-                    logging.info(f"{domain} returned {len(errors)} error indicators")
-        except requests.exceptions.SSLError:
+        r = responses.get(f"https://{domain}", {})
+        if r.get("error") == "ssl_error":
             logging.warning(f"SSL error for {domain}, skipping.")
-        except requests.exceptions.Timeout:
+        elif r.get("error") == "timeout":
             logging.warning(f"Timeout on {domain}, skipping.")
-        except requests.exceptions.RequestException as e:
-            logging.debug(f"Request error fetching {domain}: {e}")
+        elif "error" in r:
+            logging.debug(f"Request error fetching {domain}: {r.get('detail')}")
+        else:
+            errors = sorted({text for _, text in r["matches"]})
+            if errors:
+                output[domain] = errors
+                logging.info(f"{domain} returned {len(errors)} error indicators")
 
+    output = carry_forward(shared_data, "error_pages", output)
     shared_data["error_pages"] = output
     return output
@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from dns_resolution_module import primary_ip
+
+DEFAULT_DB_NAME = "findings.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    session_id TEXT PRIMARY KEY,
+    root_domain TEXT,
+    company_name TEXT,
+    exported_at REAL
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    session_id TEXT,
+    root_domain TEXT,
+    host TEXT,
+    cname TEXT,
+    PRIMARY KEY (session_id, host)
+);
+CREATE INDEX IF NOT EXISTS idx_hosts_host ON hosts(host);
+CREATE TABLE IF NOT EXISTS host_ips (
+    session_id TEXT,
+    host TEXT,
+    ip TEXT,
+    asn TEXT,
+    org TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_host_ips_host ON host_ips(host);
+CREATE INDEX IF NOT EXISTS idx_host_ips_ip ON host_ips(ip);
+CREATE INDEX IF NOT EXISTS idx_host_ips_asn ON host_ips(asn);
+CREATE TABLE IF NOT EXISTS certs (
+    session_id TEXT,
+    host TEXT,
+    subject_cn TEXT,
+    issuer TEXT,
+    not_before TEXT,
+    not_after TEXT,
+    serial TEXT,
+    san TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_certs_host ON certs(host);
+CREATE TABLE IF NOT EXISTS ics_exposures (
+    session_id TEXT,
+    host TEXT,
+    ip TEXT,
+    asn TEXT,
+    port INTEGER,
+    transport TEXT,
+    product TEXT,
+    org TEXT,
+    risk_score INTEGER,
+    severity TEXT,
+    mitre_attack TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ics_host ON ics_exposures(host);
+CREATE INDEX IF NOT EXISTS idx_ics_ip ON ics_exposures(ip);
+CREATE INDEX IF NOT EXISTS idx_ics_asn_port ON ics_exposures(asn, port);
+CREATE INDEX IF NOT EXISTS idx_ics_port ON ics_exposures(port);
+CREATE INDEX IF NOT EXISTS idx_ics_severity ON ics_exposures(severity);
+CREATE TABLE IF NOT EXISTS vulns (
+    session_id TEXT,
+    host TEXT,
+    ip TEXT,
+    port INTEGER,
+    cve TEXT,
+    severity TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_vulns_host_port ON vulns(host, port);
+CREATE INDEX IF NOT EXISTS idx_vulns_cve ON vulns(cve);
+CREATE INDEX IF NOT EXISTS idx_vulns_severity ON vulns(severity);
+CREATE TABLE IF NOT EXISTS cloud_providers (
+    session_id TEXT,
+    host TEXT,
+    provider TEXT,
+    status_code INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_cloud_host ON cloud_providers(host);
+CREATE INDEX IF NOT EXISTS idx_cloud_provider ON cloud_providers(provider);
+CREATE TABLE IF NOT EXISTS vendors (
+    session_id TEXT,
+    host TEXT,
+    vendor TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_vendors_host ON vendors(host);
+CREATE INDEX IF NOT EXISTS idx_vendors_vendor ON vendors(vendor);
+CREATE TABLE IF NOT EXISTS buckets (
+    session_id TEXT,
+    bucket TEXT,
+    provider TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets(bucket);
+CREATE INDEX IF NOT EXISTS idx_buckets_status ON buckets(status);
+CREATE TABLE IF NOT EXISTS path_hits (
+    session_id TEXT,
+    host TEXT,
+    path TEXT,
+    status INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_paths_host ON path_hits(host);
+CREATE INDEX IF NOT EXISTS idx_paths_status ON path_hits(status);
+"""
+
+# Tables holding one session's findings; re-exporting a session replaces its rows
+FINDING_TABLES = ["hosts", "host_ips", "certs", "ics_exposures", "vulns",
+                  "cloud_providers", "vendors", "buckets", "path_hits"]
+
+
+def severity_for(score):
+    if score is None:
+        return None
+    if score >= 8:
+        return "critical"
+    if score >= 6:
+        return "high"
+    if score >= 3:
+        return "medium"
+    return "low"
+
+
+def _asn_index(data):
+    """Map each IP Shodan reported on to its (asn, org)."""
+    index = {}
+    for entry in (data.get("shodan_results") or {}).values():
+        host = entry.get("data") or {}
+        ip = entry.get("ip") or host.get("ip_str")
+        if ip and ip not in index:
+            index[ip] = (host.get("asn"), host.get("org"))
+    return index
+
+
+def host_rows(session_id, data):
+    root = data.get("root_domain")
+    records = data.get("dns_records") or {}
+    for host in dict.fromkeys(list(data.get("subdomains") or []) + list(records)):
+        cname = (records.get(host) or {}).get("cname") or []
+        yield session_id, root, host, ",".join(cname) or None
+
+
+def host_ip_rows(session_id, data, asns):
+    for host, record in (data.get("dns_records") or {}).items():
+        for ip in record.get("a", []) + record.get("aaaa", []):
+            asn, org = asns.get(ip, (None, None))
+            yield session_id, host, ip, asn, org
+
+
+def cert_rows(session_id, data):
+    for host, cert in (data.get("cert_data") or {}).items():
+        if not cert:
+            continue
+        san = [value for _, value in cert.get("subjectAltName", [])]
+        yield (session_id, host, cert.get("subject", {}).get("commonName"),
+               cert.get("issuer", {}).get("organizationName") or cert.get("issuer", {}).get("commonName"),
+               cert.get("notBefore"), cert.get("notAfter"), cert.get("serialNumber"), ",".join(san))
+
+
+def _host_ip(host, data):
+    shodan = (data.get("shodan_results") or {}).get(host) or {}
+    return shodan.get("ip") or primary_ip((data.get("dns_records") or {}).get(host)) or host
+
+
+def ics_rows(session_id, data, asns):
+    for host, exposures in (data.get("ics_exposure") or {}).items():
+        for e in exposures:
+            # The ICS module records the IP and ASN from its own Shodan lookup; older
+            # sessions lack them, so fall back to DNS and the Shodan Scan results
+            ip = e.get("ip") or _host_ip(host, data)
+            asn = e.get("asn") or asns.get(ip, (None, None))[0]
+            yield (session_id, host, ip, asn, e.get("port"), e.get("transport"),
+                   e.get("product"), e.get("org"), e.get("risk_score"), severity_for(e.get("risk_score")),
+                   json.dumps(e.get("mitre_attack") or []))
+
+
+def vuln_rows(session_id, data):
+    # One row per (host, port, cve); the ICS rows come first because they carry a severity
+    seen = set()
+    for host, exposures in (data.get("ics_exposure") or {}).items():
+        ip = _host_ip(host, data)
+        for e in exposures:
+            cvss = e.get("cvss") or {}
+            for cve in e.get("vulns") or []:
+                if (host, e.get("port"), cve) in seen:
+                    continue
+                seen.add((host, e.get("port"), cve))
+                # The CVE's own CVSS severity when the offline index knew it, else the exposure's risk
+                severity = (cvss.get(cve) or {}).get("severity")
+                yield session_id, host, ip, e.get("port"), cve, (severity.lower() if severity else
+                                                                 severity_for(e.get("risk_score")))
+    # CVEs Shodan tags on non-ICS services, keyed to the port they were seen on
+    for host, entry in (data.get("shodan_results") or {}).items():
+        for item in (entry.get("data") or {}).get("data", []):
+            for cve in item.get("vulns") or {}:
+                if (host, item.get("port"), cve) in seen:
+                    continue
+                seen.add((host, item.get("port"), cve))
+                yield session_id, host, entry.get("ip"), item.get("port"), cve, None
+
+
+def cloud_rows(session_id, data):
+    for host, entry in (data.get("cloud_fingerprint") or {}).items():
+        for provider in entry.get("cloud_providers") or []:
+            yield session_id, host, provider, entry.get("status_code")
+
+
+def vendor_rows(session_id, data):
+    for host, vendors in (data.get("supply_chain") or {}).items():
+        for vendor in vendors:
+            yield session_id, host, vendor
+
+
+def bucket_rows(session_id, data):
+    for bucket, providers in (data.get("bucket_audit") or {}).items():
+        if not isinstance(providers, dict):
+            continue
+        for provider, status in providers.items():
+            yield session_id, bucket, provider, None if status is None else str(status)
+
+
+def path_rows(session_id, data):
+    for host, hits in (data.get("path_fuzzing") or {}).items():
+        for hit in hits or []:
+            yield session_id, host, hit.get("path"), hit.get("status")
+
+
+def connect(path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def export_findings(data, path, session_id=None):
+    """
+    Write a session's findings as normalized, indexed tables into the SQLite
+    file at path. Several sessions and targets can share one file; every row
+    carries its session_id and an existing export of the same session is replaced.
+    """
+    session_id = session_id or data.get("session_id") or time.strftime("%Y%m%d-%H%M%S")
+    asns = _asn_index(data)
+    tables = [
+        ("hosts", host_rows(session_id, data)),
+        ("host_ips", host_ip_rows(session_id, data, asns)),
+        ("certs", cert_rows(session_id, data)),
+        ("ics_exposures", ics_rows(session_id, data, asns)),
+        ("vulns", vuln_rows(session_id, data)),
+        ("cloud_providers", cloud_rows(session_id, data)),
+        ("vendors", vendor_rows(session_id, data)),
+        ("buckets", bucket_rows(session_id, data)),
+        ("path_hits", path_rows(session_id, data)),
+    ]
+
+    conn = connect(path)
+    try:
+        with conn:
+            for table in FINDING_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            conn.execute("INSERT OR REPLACE INTO scans (session_id, root_domain, company_name, exported_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (session_id, data.get("root_domain"), data.get("company_name"), time.time()))
+            counts = {}
+            for table, rows in tables:
+                width = len(conn.execute(f"SELECT * FROM {table} LIMIT 0").description)
+                cursor = conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * width)})", rows)
+                counts[table] = cursor.rowcount
+    finally:
+        conn.close()
+    logging.info(f"Exported session {session_id} to {path}: "
+                 + ", ".join(f"{n} {t}" for t, n in counts.items() if n))
+    return path
@@ -1,29 +1,148 @@
 import requests
 import logging
 import os
-from utils import get_api_key  
-
-def github_search(domain, token=None):
-    query = f'"{domain}"'
-    url = f"https://api.github.com/search/code?q={query}"
-    headers = {"Accept": "application/vnd.github.v3+json"}
-    if token:
-        headers["Authorization"] = f"token {token}"
-
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            items = data.get("items", [])
-            results = [{"name": item.get("name"), "repo": item["repository"]["full_name"], "url": item["html_url"]}
-                       for item in items]
-            return results
-        else:
-            logging.warning(f"GitHub API returned status {r.status_code}: {r.text}")
-            return []
-    except Exception as e:
-        logging.error(f"GitHub search error: {e}")
-        return []
+import threading
+import time
+from utils import get_api_key
+from disk_cache import DiskCache
+
+READS = ["root_domain", "company_name", "subdomains"]
+WRITES = ["github_leaks"]
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+PER_PAGE = 100
+# The search API never returns more than 1000 results per query
+MAX_PAGES = 10
+MAX_SUBDOMAIN_QUERIES = 10
+MAX_RETRIES = 3
+# ETags stay valid for as long as GitHub keeps answering 304, so entries never expire
+ETAG_CACHE_TTL = None
+
+
+class RateLimitGate:
+    """
+    Tracks X-RateLimit-Remaining/Reset from every response. When the quota
+    is used up, callers sleep until the reset time instead of failing.
+    """
+
+    def __init__(self):
+        self.remaining = None
+        self.reset_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        with self._lock:
+            if "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                self.reset_at = float(headers["X-RateLimit-Reset"])
+
+    def wait(self):
+        with self._lock:
+            delay = self.reset_at - time.time() if self.remaining == 0 else 0
+        if delay > 0:
+            logging.warning(f"GitHub rate limit exhausted; sleeping {delay:.0f}s until reset")
+            time.sleep(delay + 1)
+            with self._lock:
+                self.remaining = None
+
+    @staticmethod
+    def is_limited(response):
+        # GitHub answers 403 both for permission errors and for primary/secondary rate limits
+        return response.status_code == 429 or (response.status_code == 403 and (
+            "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"))
+
+    def backoff(self, response, attempt):
+        """Seconds to wait before retrying a rate-limited response."""
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return max(0.0, float(response.headers.get("X-RateLimit-Reset", 0)) - time.time()) + 1
+        return 2.0 ** (attempt + 1)
+
+
+class GitHubSearch:
+    """
+    Code search with pagination, one rate-limit gate for every query, and conditional
+    requests: every page's ETag and body are kept on disk, so a rescan of
+    unchanged results is answered with 304s that cost no quota.
+    """
+
+    def __init__(self, token=None, api_url=GITHUB_API_URL, cache_ttl=ETAG_CACHE_TTL):
+        self.api_url = api_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.gate = RateLimitGate()
+        self.cache = DiskCache("github", cache_ttl)
+        self.requests = 0
+        self.not_modified = 0
+
+    def _get(self, url, params=None):
+        cache_key = requests.Request("GET", url, params=params).prepare().url
+        cached = self.cache.get(cache_key)
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        for attempt in range(MAX_RETRIES + 1):
+            self.gate.wait()
+            self.requests += 1
+            r = self.session.get(url, params=params, headers=headers, timeout=30)
+            self.gate.update(r.headers)
+            if self.gate.is_limited(r) and attempt < MAX_RETRIES:
+                delay = self.gate.backoff(r, attempt)
+                logging.warning(f"GitHub returned {r.status_code} (rate limited); retrying in {delay:.0f}s")
+                time.sleep(delay)
+                continue
+            break
+        if r.status_code == 304 and cached:
+            self.not_modified += 1
+            return cached["body"], cached["next"]
+        r.raise_for_status()
+        body = r.json()
+        next_url = r.links.get("next", {}).get("url")
+        if r.headers.get("ETag"):
+            self.cache.set(cache_key, {"etag": r.headers["ETag"], "body": body, "next": next_url})
+        return body, next_url
+
+    def search_code(self, query, max_pages=MAX_PAGES):
+        """Yield every item for query, following the Link header page by page."""
+        url, params = f"{self.api_url}/search/code", {"q": query, "per_page": PER_PAGE}
+        for _ in range(max_pages):
+            body, url = self._get(url, params)
+            yield from body.get("items", [])
+            if body.get("incomplete_results"):
+                logging.warning(f"GitHub returned incomplete results for {query}")
+            if not url:
+                break
+            # The next link already carries the query
+            params = None
+
+
+def search_queries(domain, company=None, subdomains=None):
+    queries = [f'"{domain}"']
+    if company:
+        queries.append(f'"{company}"')
+    for sub in sorted(set(subdomains or []) - {domain})[:MAX_SUBDOMAIN_QUERIES]:
+        queries.append(f'"{sub}"')
+    return queries
+
+
+def github_search(domain, token=None, company=None, subdomains=None, api_url=None):
+    client = GitHubSearch(token, api_url or GITHUB_API_URL)
+    results = {}
+    for query in search_queries(domain, company, subdomains):
+        try:
+            for item in client.search_code(query):
+                url = item["html_url"]
+                if url not in results:
+                    results[url] = {"name": item.get("name"), "repo": item["repository"]["full_name"],
+                                    "url": url, "queries": []}
+                results[url]["queries"].append(query)
+        except Exception as e:
+            logging.error(f"GitHub search error for {query}: {e}")
+    logging.info(f"GitHub code search: {len(results)} files, {client.requests} requests "
+                 f"({client.not_modified} unchanged pages served from cache)")
+    return list(results.values())
 
 def run(shared_data):
     logging.info("Running GitHub Search Module")
@@ -32,7 +151,9 @@ def run(shared_data):
         logging.warning("No root_domain found in shared_data")
         return []
 
-    token = get_api_key("GITHUB_TOKEN")  
-    results = github_search(domain, token=token)
+    token = get_api_key("GITHUB_TOKEN")
+    results = github_search(domain, token=token, company=shared_data.get("company_name"),
+                            subdomains=shared_data.get("subdomains"),
+                            api_url=shared_data.get("github_api_url"))
     shared_data["github_leaks"] = results
     return results
@@ -2,6 +2,10 @@ import os
 import logging
 from utils import get_api_key
 from shodan_utils import shodan_search, shodan_get_asn
+from ip_index import collapse_by_asn
+
+READS = ["company_name", "organization_name", "origin_registrant", "prefix_registrant", "cert_domains"]
+WRITES = ["grid_asns", "grid_ips", "grid_cidrs", "grid_sources"]
 
 def get_api_key(key):
     return os.getenv(key)
@@ -14,7 +18,7 @@ def run(shared_data):
         shared_data.get("prefix_registrant")
     ]))
     
-    if not search_terms:
+    if not search_terms and not shared_data.get("non_interactive"):
         manual = input("Enter a fallback organization search term (optional): ").strip()
         if manual:
             search_terms.append(manual)
@@ -22,6 +26,8 @@ def run(shared_data):
     domains = shared_data.get("cert_domains", [])
     asns = set()
     ip_ranges = set()
+    # (ip, asn) for every match, collapsed into CIDR blocks per ASN at the end
+    located = set()
 
     for term in search_terms:
         logging.info(f"Searching Shodan for org: {term}")
@@ -33,6 +39,7 @@ def run(shared_data):
                 asns.add(asn)
             if ip:
                 ip_ranges.add(ip + "/32")
+                located.add((ip, asn))
 
     if not asns and domains:
         logging.info("No ASNs from org name, trying fallback cert domain-based resolution...")
@@ -45,11 +52,15 @@ def run(shared_data):
                     asns.add(asn)
                 if ip:
                     ip_ranges.add(ip + "/32")
+                    located.add((ip, asn))
 
     shared_data["grid_asns"] = sorted(asns)
     shared_data["grid_ips"] = sorted(ip_ranges)
+    cidrs = collapse_by_asn(located)
+    shared_data["grid_cidrs"] = cidrs
     shared_data["grid_sources"] = ["shodan"]
-    logging.info(f"Identified {len(asns)} ASNs and {len(ip_ranges)} IPs for scanning.")
+    logging.info(f"Identified {len(asns)} ASNs and {len(ip_ranges)} IPs for scanning "
+                 f"({sum(len(c) for c in cidrs.values())} CIDR blocks).")
 
 def fetch_grid_related_ips(shared_data):
     return run(shared_data)
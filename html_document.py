@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+# Tags whose src/href point at a resource the page loads
+RESOURCE_TAGS = ("script", "link", "img", "iframe")
+CACHE_SIZE = 256
+
+
+class HTMLDocument:
+    """What the extractors need from a page, collected in one parse."""
+
+    def __init__(self):
+        self.title = ""
+        self.script_srcs = []
+        self.inline_scripts = []
+        # (tag, url) for every script/link/img/iframe, from src or else href
+        self.resources = []
+
+
+class _Extractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.document = HTMLDocument()
+        self._script = None
+        self._title = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in RESOURCE_TAGS and tag != "title":
+            return
+        attrs = dict(attrs)
+        if tag == "title":
+            self._title = []
+            return
+        url = attrs.get("src") or attrs.get("href")
+        if url:
+            self.document.resources.append((tag, url))
+        if tag == "script":
+            if attrs.get("src"):
+                self.document.script_srcs.append(attrs["src"])
+            self._script = []
+
+    def handle_startendtag(self, tag, attrs):
+        # <script src=... /> has no body to collect
+        self.handle_starttag(tag, attrs)
+        if tag == "script":
+            self._script = None
+        elif tag == "title":
+            self._title = None
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+        elif self._title is not None:
+            self._title.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script is not None:
+            code = "".join(self._script)
+            if code:
+                self.document.inline_scripts.append(code)
+            self._script = None
+        elif tag == "title" and self._title is not None:
+            if not self.document.title:
+                self.document.title = "".join(self._title).strip()
+            self._title = None
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"parses": 0, "hits": 0}
+
+
+def parse_document(html):
+    """
+    Extract title, script sources, inline script bodies and resource URLs
+    from html in a single pass. Results are cached by content, so every
+    extractor looking at the same response shares one parse.
+    """
+    html = html or ""
+    key = hashlib.blake2b(html.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _cache_lock:
+        document = _cache.get(key)
+        if document is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return document
+    extractor = _Extractor()
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception as e:
+        # Whatever was extracted before the parser gave up is still returned
+        logging.error(f"Error parsing HTML document: {e}")
+    document = extractor.document
+    with _cache_lock:
+        _stats["parses"] += 1
+        _cache[key] = document
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return document
+
+
+def cache_stats():
+    with _cache_lock:
+        return dict(_stats, entries=len(_cache))
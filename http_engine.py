@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import aiohttp
+
+DEFAULT_CONCURRENCY = 200
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 5
+READ_CHUNK = 64 * 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+PREFETCH_TIMEOUT = 5
+
+
+class ResponseCache:
+    """
+    Session-scoped LRU of GET responses keyed by (url, allow_redirects), plus
+    the SignatureSet for scanned fetches, which keep only their matches.
+    Size is bounded by the approximate bytes of cached bodies and headers.
+    A URL being fetched is claimed, so concurrent callers for it wait for
+    that response instead of requesting it again.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # {key: Future of (response, max_body)} for fetches in progress
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url, allow_redirects, scan=None):
+        return (url, allow_redirects) if scan is None else (url, allow_redirects, scan)
+
+    @staticmethod
+    def _entry_size(response):
+        headers = response.get("headers") or {}
+        matches = sum(len(name) + len(text) for name, text in response.get("matches", ()))
+        return len(response.get("text", "")) + matches + sum(len(k) + len(v) for k, v in headers.items()) + 256
+
+    @staticmethod
+    def covers(cached_max_body, max_body):
+        # A body read under a byte cap only satisfies callers asking for no more than that cap
+        return cached_max_body is None or (max_body is not None and max_body <= cached_max_body)
+
+    def _find(self, key, max_body):
+        entry = self._entries.get(key)
+        if entry is None or not self.covers(entry[1], max_body):
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, url, allow_redirects=True, max_body=None, scan=None):
+        with self._lock:
+            response = self._find(self._key(url, allow_redirects, scan), max_body)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def claim(self, url, allow_redirects=True, max_body=None, scan=None):
+        """
+        (response, None) on a hit. A scanned lookup also hits on a plain cached
+        body, which the caller scans itself. On a miss, (None, future) when
+        another caller is already fetching the URL; the future resolves to
+        (response, max_body) once it is done, or None if that fetch failed.
+        Otherwise (None, None): the caller now owns the fetch and must put()
+        or release() it.
+        """
+        key = self._key(url, allow_redirects, scan)
+        with self._lock:
+            response = self._find(key, max_body)
+            if response is None and scan is not None:
+                response = self._find(self._key(url, allow_redirects), max_body)
+            if response is not None:
+                self.hits += 1
+                return response, None
+            if key in self._inflight:
+                self.hits += 1
+                return None, self._inflight[key]
+            self.misses += 1
+            self._inflight[key] = Future()
+            return None, None
+
+    def put(self, url, response, allow_redirects=True, max_body=None, scan=None):
+        key = self._key(url, allow_redirects, scan)
+        size = self._entry_size(response)
+        with self._lock:
+            pending = self._inflight.pop(key, None)
+            if size <= self.max_bytes:
+                if key in self._entries:
+                    self.size -= self._entries.pop(key)[2]
+                self._entries[key] = (response, max_body, size)
+                self.size += size
+                while self.size > self.max_bytes:
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self.size -= evicted
+        if pending is not None:
+            pending.set_result((response, max_body))
+
+    def release(self, urls, allow_redirects=True, scan=None):
+        """Give up claims that were never put(); their waiters fetch for themselves."""
+        with self._lock:
+            pending = [self._inflight.pop(self._key(url, allow_redirects, scan), None) for url in urls]
+        for future in pending:
+            if future is not None:
+                future.set_result(None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.size
+        }
+
+
+def get_cache(shared_data):
+    if shared_data is None:
+        return None
+    cache = shared_data.get("_http_cache")
+    if cache is None:
+        cache = shared_data.setdefault("_http_cache", ResponseCache(
+            int(shared_data.get("http_cache_bytes", DEFAULT_CACHE_BYTES))))
+    return cache
+
+
+def cache_summary(shared_data):
+    cache = (shared_data or {}).get("_http_cache")
+    if cache is None:
+        return None
+    stats = cache.stats()
+    return (f"HTTP response cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries, {stats['bytes'] // 1024} KiB)")
+
+
+def engine_settings(shared_data=None):
+    shared_data = shared_data or {}
+    concurrency = int(shared_data.get("http_concurrency", DEFAULT_CONCURRENCY))
+    per_host = int(shared_data.get("http_per_host", DEFAULT_PER_HOST))
+    return concurrency, per_host
+
+
+def open_session(concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST):
+    """
+    Pooled aiohttp session. Connections are kept alive and reused per host;
+    the connector enforces both the global and the per-host limits.
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def _read_capped(resp, max_body):
+    if not max_body:
+        return await resp.read()
+    body = bytearray()
+    while len(body) < max_body:
+        chunk = await resp.content.read(min(READ_CHUNK, max_body - len(body)))
+        if not chunk:
+            break
+        body.extend(chunk)
+    return bytes(body)
+
+
+async def _scan_body(resp, scan, max_body):
+    scanner = scan.scanner(max_body, resp.charset or "utf-8")
+    async for chunk in resp.content.iter_chunked(READ_CHUNK):
+        scanner.feed_bytes(chunk)
+        if scanner.full:
+            break
+    return sorted(scanner.close())
+
+
+async def _read_body(resp, max_body, scan):
+    """(text, matches) for the response body; matches is None without scan."""
+    if scan is not None:
+        return "", await _scan_body(resp, scan, max_body)
+    body = await _read_capped(resp, max_body)
+    return body.decode(resp.charset or "utf-8", errors="replace"), None
+
+
+async def fetch(session, url, method="GET", timeout=DEFAULT_TIMEOUT, allow_redirects=True,
+                read_body=True, max_body=None, headers=None, scan=None):
+    """
+    With scan (a signatures.SignatureSet), the body is matched chunk by chunk
+    as it arrives and only the matches are returned, under "matches".
+
+    timeout applies to connecting, to each read, and to the body as a whole,
+    but not to time spent queued for one of the connector's per-host slots,
+    so requests beyond http_per_host to one host wait instead of timing out.
+    """
+    request_timeout = aiohttp.ClientTimeout(total=None, connect=None, sock_connect=timeout, sock_read=timeout)
+    try:
+        async with session.request(method, url, headers=headers, allow_redirects=allow_redirects,
+                                   timeout=request_timeout) as resp:
+            text = ""
+            matches = None
+            if read_body and method != "HEAD":
+                text, matches = await asyncio.wait_for(_read_body(resp, max_body, scan), timeout)
+            response = {
+                "url": url,
+                "final_url": str(resp.url),
+                "status_code": resp.status,
+                "headers": dict(resp.headers),
+                "text": text
+            }
+            if matches is not None:
+                response["matches"] = matches
+            return response
+    except asyncio.TimeoutError:
+        return {"url": url, "error": "timeout"}
+    except aiohttp.ClientSSLError as e:
+        return {"url": url, "error": "ssl_error", "detail": str(e)}
+    except (aiohttp.ClientError, ValueError, LookupError) as e:
+        return {"url": url, "error": "connection_error", "detail": str(e)}
+
+
+async def fetch_all_async(urls, shared_data=None, session=None, **kwargs):
+    concurrency, per_host = engine_settings(shared_data)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def bounded(s, url):
+        async with sem:
+            return url, await fetch(s, url, **kwargs)
+
+    if session is not None:
+        pairs = await asyncio.gather(*(bounded(session, u) for u in urls))
+    else:
+        async with open_session(concurrency, per_host) as s:
+            pairs = await asyncio.gather(*(bounded(s, u) for u in urls))
+    return dict(pairs)
+
+
+def fetch_all(urls, shared_data=None, use_cache=True, **kwargs):
+    """
+    Fetch every URL concurrently and return {url: response dict}.
+    Failed requests carry an "error" key instead of "status_code".
+    Successful GETs are served from and stored into the session's response
+    cache; failures are not, so a later call tries again. A URL another
+    thread is already fetching is waited for, not requested twice. Scanned
+    fetches are cached with their matches, and also reuse a plain cached
+    body by scanning it.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    cacheable = (use_cache and kwargs.get("method", "GET") == "GET"
+                 and kwargs.get("read_body", True) and not kwargs.get("headers"))
+    cache = get_cache(shared_data) if cacheable else None
+    allow_redirects = kwargs.get("allow_redirects", True)
+    max_body = kwargs.get("max_body")
+
+    scan = kwargs.get("scan")
+
+    results, waiting, pending = {}, {}, []
+    for url in urls:
+        cached, waiter = cache.claim(url, allow_redirects, max_body, scan) if cache is not None else (None, None)
+        if cached is not None:
+            if scan is not None and "error" not in cached and "matches" not in cached:
+                cached = dict(cached, text="", matches=sorted(scan.scan(cached["text"], max_body)))
+            results[url] = cached
+        elif waiter is not None:
+            waiting[url] = waiter
+        else:
+            pending.append(url)
+
+    concurrency, per_host = engine_settings(shared_data)
+    if pending:
+        logging.info(f"Fetching {len(pending)} URLs ({concurrency} in flight, {per_host} per host, "
+                     f"{len(results)} served from cache, {len(waiting)} already being fetched)")
+        try:
+            fetched = asyncio.run(fetch_all_async(pending, shared_data, **kwargs))
+            if cache is not None:
+                for url, response in fetched.items():
+                    # A timeout or refused connection may not repeat, and a later caller may
+                    # allow a longer timeout; the finally below releases those claims
+                    if "error" not in response:
+                        cache.put(url, response, allow_redirects, max_body, scan)
+            results.update(fetched)
+        finally:
+            if cache is not None:
+                cache.release(pending, allow_redirects, scan)
+
+    # Only wait once this thread's own claims are settled, so two callers never wait on each other
+    refetch = []
+    for url, waiter in waiting.items():
+        shared = waiter.result()
+        if shared is not None and ResponseCache.covers(shared[1], max_body):
+            results[url] = shared[0]
+        else:
+            refetch.append(url)
+    if refetch:
+        results.update(asyncio.run(fetch_all_async(refetch, shared_data, **kwargs)))
+    return {url: results[url] for url in urls}
+
+
+def prefetch_pages(hosts, shared_data):
+    """
+    PREFETCH hook for the stages that GET https://host: fetch the pages into the
+    session cache while enumeration runs. Incremental runs probe only the hosts
+    their plan picks, which is not known yet, so they skip it.
+    """
+    if shared_data.get("incremental_mode"):
+        return
+    fetch_all([f"https://{host}" for host in hosts], shared_data, timeout=PREFETCH_TIMEOUT)
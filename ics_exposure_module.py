@@ -1,9 +1,15 @@
-from utils import get_api_key
 import shodan
-import socket
 import logging
 import os
-from grid_ip_harvester_module import fetch_grid_related_ips
+from dns_resolution_module import ensure_resolved, group_by_ip
+from shodan_utils import get_api
+from incremental import probe_targets, carry_forward
+from cve_index import get_index
+from ip_index import grid_index, grid_tag
+
+READS = ["subdomains", "dns_records", "grid_ips", "grid_cidrs", "incremental_plan"]
+WRITES = ["ics_exposure"]
+
 ICS_PORTS = {
     502: "Modbus",
     20000: "DNP3",
@@ -28,64 +34,77 @@ MITRE_MAP = {
     "Allen-Bradley": "T0883",
     "Mitsubishi": "T0884"
 }
-def assign_risk_score(port, vulns):
+def assign_risk_score(port, vulns, max_cvss=None):
     score = 0
     if port in ICS_PORTS:
         score += 3
-    if vulns:
+    # With the local CVE index, the worst CVSS score counts instead of the CVE count
+    if max_cvss is not None:
+        score += round(max_cvss * 0.7)
+    elif vulns:
         score += len(vulns)
     return min(score, 10)
+def cvss_details(vulns, shared_data):
+    index = get_index(shared_data)
+    if not index or not vulns:
+        return {}
+    return {cve: {"score": r["score"], "severity": r["severity"], "vector": r["vector"]}
+            for cve, r in index.enrich(vulns).items()}
 def run(shared_data):
     logging.info("Running ICS Exposure Module with risk scoring")
-    api_key = get_api_key("SHODAN_API_KEY")
-    api_key = get_api_key("SHODAN_API_KEY")
-    if not api_key:
+    api = get_api(shared_data)
+    if not api:
         return {}
         logging.error("SHODAN_API_KEY not set in environment variables.")
         return {}
     subdomains = shared_data.get("subdomains", [])
-    search_ips = []
-    for host in subdomains:
-        try:
-            ip = socket.gethostbyname(host)
-            search_ips.append((host, ip))
-        except Exception as e:
-            logging.warning(f"Failed to resolve {host}: {e}")
-    suspect_ips = fetch_grid_related_ips(keywords=["port:502", "port:102", "modbus", "dnp3", "Electric Cooperative"], limit=100)
-    for ip in suspect_ips:
-        search_ips.append((ip, ip))
-    api = shodan.Shodan(api_key)
+    # One Shodan lookup per unique IP; exposures are fanned out to every hostname on it
+    ip_groups = group_by_ip(ensure_resolved(shared_data, probe_targets(shared_data, subdomains)))
+    for entry in shared_data.get("grid_ips", []):
+        ip = entry.split("/")[0] if entry.endswith("/32") else None
+        if ip:
+            ip_groups.setdefault(ip, [ip])
+    grid = grid_index(shared_data)
     exposure_results = {}
-    for hostname, ip in search_ips:
+    for ip, hostnames in ip_groups.items():
         try:
             response = api.host(ip)
+            in_grid = grid_tag(grid, ip)
+            exposures = []
             for item in response.get("data", []):
                 port = item.get("port")
                 product = item.get("product", "")
                 if port in ICS_PORTS or any(p.lower() in product.lower() for p in ICS_PORTS.values()):
                     vulns = list(item.get("vulns", {}).keys()) if item.get("vulns") else []
-                    risk = assign_risk_score(port, vulns)
+                    cvss = cvss_details(vulns, shared_data)
+                    scores = [c["score"] for c in cvss.values() if c["score"] is not None]
+                    risk = assign_risk_score(port, vulns, max(scores) if scores else None)
                     mitre = []
                     for key, tactic in MITRE_MAP.items():
                         if key.lower() in product.lower():
                             mitre.append(tactic)
-                    exposure = {
+                    exposures.append({
                         "port": port,
                         "product": product,
                         "transport": item.get("transport"),
+                        "ip": ip,
+                        "asn": response.get("asn"),
                         "org": response.get("org"),
                         "location": response.get("location"),
                         "vulns": vulns,
+                        "cvss": cvss,
                         "risk_score": risk,
-                        "mitre_attack": mitre
-                    }
-                    if hostname not in exposure_results:
-                        exposure_results[hostname] = []
-                    exposure_results[hostname].append(exposure)
-                    logging.info(f"ICS risk exposure for {hostname} - risk {risk} - port {port}")
+                        "mitre_attack": mitre,
+                        "in_grid": in_grid
+                    })
+                    logging.info(f"ICS risk exposure for {ip} ({', '.join(hostnames)}) - risk {risk} - port {port}")
+            if exposures:
+                for hostname in hostnames:
+                    exposure_results[hostname] = [dict(e) for e in exposures]
         except shodan.APIError as e:
             logging.warning(f"Shodan API error for {ip}: {e}")
         except Exception as e:
             logging.error(f"Error checking ICS exposure for {ip}: {e}")
+    exposure_results = carry_forward(shared_data, "ics_exposure", exposure_results)
     shared_data["ics_exposure"] = exposure_results
     return exposure_results
@@ -0,0 +1,182 @@
+import logging
+import time
+from datetime import datetime
+
+from dns_resolution_module import ensure_resolved
+from session_store import SessionStore
+
+READS = ["subdomains", "dns_records", "incremental_mode"]
+WRITES = ["incremental_plan", "result_age"]
+
+CERT_EXPIRY_DAYS = 14
+CERT_TIME_FORMAT = "%b %d %H:%M:%S %Y %Z"
+
+
+def find_previous_session(store, root_domain, exclude=None):
+    for session_id, _, _, _ in store.list_sessions(root_domain=root_domain, limit=50):
+        if session_id == exclude:
+            continue
+        loaded = store.load_session(session_id)
+        if loaded and "subdomain_enumeration" in loaded[2]:
+            return session_id, loaded
+    return None, None
+
+
+def cert_expires_soon(cert, days=CERT_EXPIRY_DAYS):
+    if not cert or not cert.get("notAfter"):
+        return True
+    try:
+        expires = datetime.strptime(cert["notAfter"], CERT_TIME_FORMAT)
+    except ValueError:
+        return True
+    return (expires - datetime.utcnow()).total_seconds() < days * 86400
+
+
+def addresses(record):
+    return sorted(set((record or {}).get("a", []) + (record or {}).get("aaaa", [])))
+
+
+def plan_rescan(current_hosts, current_dns, previous_data, cert_days=CERT_EXPIRY_DAYS):
+    previous_hosts = set(previous_data.get("subdomains", []))
+    previous_dns = previous_data.get("dns_records", {})
+    previous_certs = previous_data.get("cert_data", {})
+    current = set(current_hosts)
+
+    appeared = sorted(current - previous_hosts)
+    vanished = sorted(previous_hosts - current)
+    ip_changed = {}
+    cert_expiring = []
+    for host in sorted(current & previous_hosts):
+        before, after = addresses(previous_dns.get(host)), addresses(current_dns.get(host))
+        if before != after:
+            ip_changed[host] = {"before": before, "after": after}
+        if host in previous_certs and cert_expires_soon(previous_certs[host], cert_days):
+            cert_expiring.append(host)
+
+    reprobe = set(appeared) | set(ip_changed) | set(cert_expiring)
+    return {
+        "appeared": appeared,
+        "vanished": vanished,
+        "ip_changed": ip_changed,
+        "cert_expiring": cert_expiring,
+        "reprobe": sorted(reprobe),
+        "carried": sorted(current - reprobe),
+    }
+
+
+def probe_targets(shared_data, hosts=None):
+    """Hosts a per-host module should actually probe in this run."""
+    hosts = shared_data.get("subdomains", []) if hosts is None else hosts
+    plan = shared_data.get("incremental_plan")
+    if not plan:
+        return hosts
+    reprobe = set(plan["reprobe"])
+    return [h for h in hosts if h in reprobe]
+
+
+def previous_session(shared_data):
+    """
+    {"id", "data"} of the session the plan compares against. A resumed
+    session has the plan from its checkpoint but not the loaded data, so
+    that is read back from the store by the id the plan recorded.
+    """
+    previous = shared_data.get("_previous_session")
+    plan = shared_data.get("incremental_plan")
+    if previous is None and plan and plan.get("previous_session"):
+        store = shared_data.get("_session_store") or SessionStore()
+        loaded = store.load_session(plan["previous_session"])
+        if loaded is None:
+            logging.warning(f"Previous session {plan['previous_session']} is gone; nothing to carry forward")
+            return None
+        previous = shared_data.setdefault("_previous_session", {"id": plan["previous_session"], "data": loaded[1]})
+    return previous
+
+
+def carry_forward(shared_data, key, results):
+    """Fill in results for unchanged hosts from the previous session."""
+    plan = shared_data.get("incremental_plan")
+    previous = previous_session(shared_data)
+    if not plan or not previous:
+        return results
+    old = previous["data"].get(key) or {}
+    carried = 0
+    for host in plan["carried"]:
+        if host in old and host not in results:
+            results[host] = old[host]
+            carried += 1
+    if carried:
+        logging.info(f"Carried forward {carried} {key} results from session {previous['id']}")
+    return results
+
+
+def run(shared_data):
+    if not shared_data.get("incremental_mode"):
+        return {}
+    logging.info("Running Incremental Rescan Planner")
+    store = shared_data.get("_session_store") or SessionStore()
+    session_id, loaded = find_previous_session(store, shared_data.get("root_domain"), shared_data.get("session_id"))
+    if not loaded:
+        logging.warning("No previous session for this root domain; running a full scan.")
+        return {}
+    inputs, previous_data, completed = loaded
+    shared_data["_previous_session"] = {"id": session_id, "data": previous_data}
+
+    subdomains = shared_data.get("subdomains", [])
+    ensure_resolved(shared_data, subdomains)
+    plan = plan_rescan(subdomains, shared_data.get("dns_records", {}), previous_data,
+                       int(shared_data.get("incremental_cert_days", CERT_EXPIRY_DAYS)))
+    plan["previous_session"] = session_id
+
+    # A carried result keeps the time it was really probed, even across several rescans
+    now = time.time()
+    probed_at = min(completed.values()) if completed else now
+    previous_age = previous_data.get("result_age", {})
+    result_age = {}
+    for host in plan["carried"]:
+        ts = previous_age.get(host, {}).get("probed_at", probed_at)
+        result_age[host] = {"probed_at": ts, "age_days": round((now - ts) / 86400, 1)}
+
+    shared_data["incremental_plan"] = plan
+    shared_data["result_age"] = result_age
+    logging.info(f"Incremental plan vs {session_id}: {len(plan['appeared'])} new, {len(plan['vanished'])} gone, "
+                 f"{len(plan['ip_changed'])} IP changes, {len(plan['cert_expiring'])} certs expiring; "
+                 f"re-probing {len(plan['reprobe'])}, carrying forward {len(plan['carried'])}")
+    return plan
+
+
+def build_delta(shared_data):
+    """Summarize what appeared, vanished or changed since the previous session."""
+    plan = shared_data.get("incremental_plan")
+    if not plan:
+        return None
+    previous = (previous_session(shared_data) or {}).get("data", {})
+    changed = {}
+
+    def note(host, reason):
+        changed.setdefault(host, []).append(reason)
+
+    for host, ips in plan["ip_changed"].items():
+        note(host, f"IP {', '.join(ips['before']) or 'none'} -> {', '.join(ips['after']) or 'none'}")
+    for host in plan["reprobe"]:
+        if host in plan["appeared"]:
+            continue
+        old_cert = previous.get("cert_data", {}).get(host) or {}
+        new_cert = shared_data.get("cert_data", {}).get(host) or {}
+        if old_cert and not new_cert:
+            note(host, "certificate no longer retrievable")
+        elif new_cert and old_cert.get("serialNumber") != new_cert.get("serialNumber"):
+            note(host, f"certificate replaced (expires {new_cert.get('notAfter', 'unknown')})")
+        old_ports = {e.get("port") for e in previous.get("ics_exposure", {}).get(host, [])}
+        new_ports = {e.get("port") for e in shared_data.get("ics_exposure", {}).get(host, [])}
+        if old_ports != new_ports:
+            note(host, f"ICS ports {sorted(old_ports)} -> {sorted(new_ports)}")
+    for host in plan["cert_expiring"]:
+        if host not in changed:
+            note(host, "certificate near expiry re-checked")
+
+    return {
+        "previous_session": plan.get("previous_session"),
+        "appeared": plan["appeared"],
+        "vanished": plan["vanished"],
+        "changed": changed,
+    }
@@ -0,0 +1,162 @@
+import ipaddress
+import socket
+
+WIDTH = {4: 32, 6: 128}
+FAMILY = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+
+def _parse_address(text):
+    # inet_pton is an order of magnitude faster than the ipaddress constructors
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except OSError:
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, text), "big")
+    except OSError:
+        raise ValueError(f"not an IP address: {text!r}")
+
+
+def _parse_network(entry):
+    """(version, network int, prefix length) for an address or CIDR string; host bits are dropped."""
+    address, _, length = entry.partition("/")
+    version, network = _parse_address(address)
+    width = WIDTH[version]
+    prefixlen = int(length) if length else width
+    if not 0 <= prefixlen <= width:
+        raise ValueError(f"invalid prefix length in {entry!r}")
+    return version, network >> (width - prefixlen) << (width - prefixlen), prefixlen
+
+
+def collapse(ints, version=4):
+    """
+    Minimal list of (network int, prefix length) blocks covering exactly the
+    given address ints. Works on plain integers, which is much faster than
+    ipaddress.collapse_addresses for large inputs.
+    """
+    width = WIDTH[version]
+    blocks = []
+    ordered = sorted(set(ints))
+    i = 0
+    while i < len(ordered):
+        # Extend a run of consecutive addresses, then split it into aligned blocks
+        start = end = ordered[i]
+        i += 1
+        while i < len(ordered) and ordered[i] == end + 1:
+            end = ordered[i]
+            i += 1
+        while start <= end:
+            # Largest block aligned at start that does not run past end
+            size = (start & -start).bit_length() - 1 if start else width
+            size = min(size, (end - start + 1).bit_length() - 1)
+            blocks.append((start, width - size))
+            start += 1 << size
+    return blocks
+
+
+def to_cidr(version, network, prefixlen):
+    return f"{socket.inet_ntop(FAMILY[version], network.to_bytes(WIDTH[version] // 8, 'big'))}/{prefixlen}"
+
+
+class PrefixIndex:
+    """
+    Longest-prefix-match over IPv4 and IPv6 prefixes keyed by integers.
+    Prefixes are held in one hash table per prefix length, so a lookup is
+    one masked dict probe per distinct length, longest first. That gives
+    the same answers as a radix trie without walking a node per bit in Python.
+    """
+
+    def __init__(self):
+        # {version: {prefix length: {network >> (width - length): value}}}
+        self._tables = {4: {}, 6: {}}
+        self._lengths = {4: [], 6: []}
+        self.size = 0
+
+    def insert(self, cidr, value=None):
+        self.insert_int(*_parse_network(cidr), value)
+
+    def insert_int(self, version, network, prefixlen, value=None):
+        width = WIDTH[version]
+        table = self._tables[version].get(prefixlen)
+        if table is None:
+            table = self._tables[version][prefixlen] = {}
+            self._lengths[version] = sorted(self._tables[version], reverse=True)
+        key = network >> (width - prefixlen)
+        if key not in table:
+            self.size += 1
+        table[key] = value
+
+    def lookup(self, ip):
+        """(cidr, value) of the most specific prefix containing ip, or None."""
+        try:
+            version, value = _parse_address(ip)
+        except (ValueError, TypeError):
+            return None
+        width = WIDTH[version]
+        tables = self._tables[version]
+        for prefixlen in self._lengths[version]:
+            table = tables[prefixlen]
+            key = value >> (width - prefixlen)
+            if key in table:
+                return to_cidr(version, key << (width - prefixlen), prefixlen), table[key]
+        return None
+
+    def __contains__(self, ip):
+        return self.lookup(ip) is not None
+
+    def __len__(self):
+        return self.size
+
+
+def collapse_by_asn(entries):
+    """
+    {asn: [cidr, ...]} with each ASN's addresses collapsed into the minimal
+    set of CIDR blocks. entries is an iterable of (ip or cidr, asn).
+    """
+    grouped = {}
+    for entry, asn in entries:
+        version, network, prefixlen = _parse_network(entry)
+        addresses = grouped.setdefault(asn or "unknown", {}).setdefault(version, [set(), []])
+        if prefixlen == WIDTH[version]:
+            addresses[0].add(network)
+        else:
+            addresses[1].append((network, prefixlen))
+    result = {}
+    for asn, versions in grouped.items():
+        cidrs = []
+        for version, (singles, prefixes) in sorted(versions.items()):
+            blocks = collapse(singles, version)
+            if prefixes:
+                # Harvested prefixes may overlap the addresses; ipaddress settles the few of those
+                networks = [ipaddress.ip_network(to_cidr(version, n, p)) for n, p in blocks + prefixes]
+                cidrs.extend(str(n) for n in ipaddress.collapse_addresses(networks))
+            else:
+                cidrs.extend(to_cidr(version, n, p) for n, p in blocks)
+        result[asn] = cidrs
+    return result
+
+
+def build_index(cidrs_by_asn):
+    index = PrefixIndex()
+    for asn, cidrs in cidrs_by_asn.items():
+        for cidr in cidrs:
+            index.insert(cidr, asn)
+    return index
+
+
+def grid_index(shared_data):
+    """PrefixIndex over the harvested grid_cidrs, built once per session."""
+    cidrs = shared_data.get("grid_cidrs")
+    if not cidrs:
+        return None
+    cached = shared_data.get("_grid_index")
+    if cached is None or cached[0] is not cidrs:
+        cached = (cidrs, build_index(cidrs))
+        shared_data["_grid_index"] = cached
+    return cached[1]
+
+
+def grid_tag(index, ip):
+    """{"cidr", "asn"} when ip falls inside the harvested grid space, else None."""
+    match = index.lookup(ip) if index is not None and ip else None
+    return {"cidr": match[0], "asn": match[1]} if match else None
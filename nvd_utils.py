@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+import requests
+from utils import get_api_key
+from disk_cache import DiskCache
+from rate_limit import TokenBucket
+
+NVD_API_URL = os.getenv("NVD_API_URL", "https://services.nvd.nist.gov/rest/json/cves/2.0")
+# NVD allows 5 requests per rolling 30s without an API key and 50 with one
+NVD_RATE = 5 / 30
+NVD_KEY_RATE = 50 / 30
+NVD_CACHE_TTL = int(os.getenv("NVD_CACHE_TTL", 24 * 3600))
+RESULTS_PER_PAGE = 3
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+# NVD answers 403 rather than 429 when a client goes over its rate limit
+RETRY_STATUSES = (403, 429, 500, 502, 503, 504)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class NVDClient:
+    """
+    Keyword CVE lookups against the NVD 2.0 API. Each distinct keyword is
+    requested at most once per process: concurrent callers wait on the
+    request already in flight, results are kept in memory for the run and
+    on disk for cache_ttl seconds, and every request shares one token bucket.
+    Set NVD_API_URL to point the client at a local stand-in.
+    """
+
+    def __init__(self, api_key=None, cache_ttl=NVD_CACHE_TTL, rate=None):
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate or (NVD_KEY_RATE if api_key else NVD_RATE))
+        self.cache = DiskCache("nvd", cache_ttl)
+        self.session = requests.Session()
+        self.calls = 0
+        self.cache_hits = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def _request(self, params):
+        headers = {"apiKey": self.api_key} if self.api_key else {}
+        for attempt in range(MAX_RETRIES + 1):
+            self.bucket.acquire()
+            self.calls += 1
+            response = self.session.get(NVD_API_URL, params=params, headers=headers, timeout=30)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            delay = BACKOFF_BASE ** attempt
+            logging.warning(f"NVD returned {response.status_code}, retrying in {delay:.0f}s")
+            time.sleep(delay)
+        response.raise_for_status()
+        return response.json()
+
+    def _lookup(self, keyword, limit):
+        cache_key = f"keyword:{keyword}|{limit}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        data = self._request({"keywordSearch": keyword, "resultsPerPage": limit})
+        cves = [item["cve"] for item in data.get("vulnerabilities", []) if "cve" in item]
+        self.cache.set(cache_key, cves)
+        return cves
+
+    def keyword_search(self, keyword, limit=RESULTS_PER_PAGE):
+        key = (keyword.lower(), limit)
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(self._lookup(key[0], limit))
+        except Exception as e:
+            # A failed keyword stays failed for this run instead of being retried per target
+            logging.error(f"Error fetching CVEs for keyword '{keyword}': {e}")
+            future.set_result([])
+        return future.result()
+
+    def stats(self):
+        return {"keywords": len(self._results), "requests": self.calls, "cache_hits": self.cache_hits}
+
+
+def get_nvd(shared_data=None):
+    global _client
+    api_key = get_api_key("NVD_API_KEY")
+    ttl = int((shared_data or {}).get("nvd_cache_ttl", NVD_CACHE_TTL))
+    rate = (shared_data or {}).get("nvd_rate")
+    with _client_lock:
+        if _client is None or _client.api_key != api_key:
+            _client = NVDClient(api_key, cache_ttl=ttl, rate=float(rate) if rate else None)
+        _client.cache.ttl = ttl
+        if rate:
+            _client.bucket.rate = float(rate)
+    return _client
@@ -1,43 +1,137 @@
-
-import requests
+import asyncio
+import hashlib
 import logging
+import uuid
+from itertools import islice
+from http_engine import open_session, fetch, engine_settings
+from session_store import load_progress, save_progress
+from utils import ask_fast_mode
+from incremental import probe_targets, carry_forward
+
+READS = ["subdomains", "cert_domains", "incremental_plan"]
+WRITES = ["path_fuzzing"]
 
 COMMON_PATHS = [
     "/.env", "/admin", "/login", "/config", "/debug", "/test", "/backup", "/.git", "/phpinfo.php",
     "/server-status", "/.DS_Store", "/wp-admin", "/robots.txt", "/sitemap.xml", "/error", "/debug.log"
 ]
 
-def fuzz_paths(domain):
-    results = []
+HIT_STATUSES = [200, 301, 302, 403]
+PROGRESS_CHUNK = 50  # hosts fuzzed between checkpoints
+FAST_MODE_PATHS = 200
+DEFAULT_PATH_TIMEOUT = 3
+MAX_BODY = 64 * 1024
+
+# Random paths requested before fuzzing to learn what "not found" looks like on each host
+BASELINE_PROBES = ["/{token}", "/{token}.php", "/{token}/"]
+LENGTH_TOLERANCE = 0.05
+# A host still producing hits on over half of its first requests after filtering is a catch-all
+WILDCARD_SAMPLE = 50
+WILDCARD_HIT_RATIO = 0.5
+
+def iter_wordlist(path=None, limit=None):
+    """
+    Stream paths one at a time from a wordlist file (one per line, # comments
+    ignored), or from COMMON_PATHS when no file is given.
+    """
+    def entries():
+        if not path:
+            yield from COMMON_PATHS
+            return
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line if line.startswith("/") else "/" + line
+
+    return islice(entries(), limit)
+
+def fingerprint(response, path):
+    # Many error pages echo the requested path; strip it so the body hash is stable
+    body = response["text"].replace(path, "")
+    return response["status_code"], len(body), hashlib.sha1(body.encode("utf-8", "replace")).hexdigest()
+
+def matches_baseline(fp, baselines):
+    for status, length, digest in baselines:
+        if fp[0] == status and (fp[2] == digest or abs(fp[1] - length) <= max(32, length * LENGTH_TOLERANCE)):
+            return True
+    return False
+
+def is_unstable_catch_all(baselines):
+    """Random paths all answered with a hit status, but too differently to filter on."""
+    if not all(status in HIT_STATUSES for status, _, _ in baselines):
+        return False
+    first = baselines[0]
+    return not all(matches_baseline(fp, [first]) for fp in baselines[1:])
+
+async def fuzz_host(session, domain, paths, sem, workers, timeout):
     base_url = f"https://{domain}"
 
-    for i, path in enumerate(COMMON_PATHS):
-        if fast_mode and i >= 200:
-            break
-        if verbose_mode:
-            time.sleep(0.25)
-        url = base_url + path
-        try:
-            response = requests.get(url, timeout=3)
-            if response.status_code in [200, 403]:
-                results.append((url, response.status_code))
-        except requests.RequestException as e:
-            logging.warning(f"Request to {url} failed: {e}")
-            if r.status_code in [200, 301, 302, 403]:
-                results.append({"path": path, "status": r.status_code})
-                logging.info(f"{domain}{path} -> {r.status_code}")
-            logging.debug(f"Request to {url} failed: {e}")
-    return results
+    async def get(path):
+        async with sem:
+            return await fetch(session, base_url + path, timeout=timeout, allow_redirects=False, max_body=MAX_BODY)
+
+    baselines = []
+    for probe in BASELINE_PROBES:
+        path = probe.format(token=uuid.uuid4().hex[:12])
+        r = await get(path)
+        if "error" not in r:
+            baselines.append(fingerprint(r, path))
+    if not baselines:
+        logging.debug(f"{domain} did not answer any baseline request; skipping")
+        return []
+    if is_unstable_catch_all(baselines):
+        logging.warning(f"{domain} answers every path and its responses vary; skipping as a wildcard host")
+        return []
+
+    hits = []
+    state = {"requests": 0, "wildcard": False}
+
+    async def worker():
+        # Workers share one wordlist iterator, so the list is never held in memory
+        for path in paths:
+            if state["wildcard"]:
+                return
+            r = await get(path)
+            state["requests"] += 1
+            if "error" in r:
+                logging.debug(f"Request to {base_url}{path} failed: {r.get('detail', r['error'])}")
+                continue
+            if r["status_code"] not in HIT_STATUSES or matches_baseline(fingerprint(r, path), baselines):
+                continue
+            hits.append({"path": path, "status": r["status_code"], "length": len(r["text"])})
+            if state["requests"] >= WILDCARD_SAMPLE and len(hits) > state["requests"] * WILDCARD_HIT_RATIO:
+                state["wildcard"] = True
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if state["wildcard"]:
+        logging.warning(f"{domain} returned {len(hits)} hits in {state['requests']} requests; "
+                        f"stopped early as a wildcard host")
+        return []
+    for hit in hits:
+        logging.info(f"{domain}{hit['path']} -> {hit['status']}")
+    return hits
+
+async def fuzz_hosts(domains, shared_data=None, wordlist=None, limit=None, timeout=DEFAULT_PATH_TIMEOUT):
+    concurrency, per_host = engine_settings(shared_data)
+    sem = asyncio.Semaphore(concurrency)
+    async with open_session(concurrency, per_host) as session:
+        results = await asyncio.gather(*(
+            fuzz_host(session, domain, iter_wordlist(wordlist, limit), sem, per_host, timeout) for domain in domains
+        ))
+    return dict(zip(domains, results))
+
+def fuzz_paths(domain, fast_mode=False, shared_data=None):
+    shared_data = shared_data or {}
+    return asyncio.run(fuzz_hosts([domain], shared_data, shared_data.get("path_wordlist"),
+                                  FAST_MODE_PATHS if fast_mode else None))[domain]
 
 def run(shared_data):
 
-    from rich.prompt import Prompt
     from rich.console import Console
-    import time
-
     console = Console()
     console.print("\n[bold cyan]Choose Path Fuzzing Module.Py Mode:[/bold cyan]")
-    fast_mode = Prompt.ask("Run in fast mode? (limits to 200 items)", choices=["y", "n"], default="y") == "y"
+    fast_mode = ask_fast_mode(shared_data, f"Run in fast mode? (limits to {FAST_MODE_PATHS} items)")
     verbose_mode = not fast_mode
     subdomains = shared_data.get("subdomains") or shared_data.get("cert_domains") or []
     if not subdomains:
@@ -50,9 +144,25 @@ def run(shared_data):
         logging.warning("No subdomains for path fuzzing.")
         return {}
 
-    output = {}
-    for domain in subdomains:
-        output[domain] = fuzz_paths(domain)
+    wordlist = shared_data.get("path_wordlist")
+    limit = FAST_MODE_PATHS if fast_mode else None
+    timeout = float(shared_data.get("path_timeout", DEFAULT_PATH_TIMEOUT))
+
+    # Hosts finished before an interruption are restored, not fuzzed again
+    output = load_progress(shared_data, __name__)
+    remaining = [d for d in probe_targets(shared_data, subdomains) if d not in output]
+    if output:
+        logging.info(f"Resuming path fuzzing: {len(output)} hosts already done, {len(remaining)} left")
+    logging.info(f"Fuzzing {len(remaining)} hosts with {wordlist or 'the built-in path list'}")
+
+    # Hosts in a chunk are fuzzed together over one keep-alive session; each host gets
+    # at most http_per_host requests in flight.
+    for start in range(0, len(remaining), PROGRESS_CHUNK):
+        chunk = remaining[start:start + PROGRESS_CHUNK]
+        for domain, hits in asyncio.run(fuzz_hosts(chunk, shared_data, wordlist, limit, timeout)).items():
+            output[domain] = hits
+            save_progress(shared_data, __name__, domain, hits)
 
+    output = carry_forward(shared_data, "path_fuzzing", output)
     shared_data["path_fuzzing"] = output
     return output
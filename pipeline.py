@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import prefetch
+import subdomain_enumeration
+import dns_resolution_module
+import incremental
+import cert_data_module
+import grid_ip_harvester_module
+import github_search_module
+import shodan_query_module
+import cloud_detection_module
+import wayback_js_module
+import error_page_extraction_module
+import path_fuzzing_module
+import supply_chain_module
+import bucket_audit_module
+import ics_exposure_module
+import screenshot_capture_module
+
+DEFAULT_PIPELINE_WORKERS = 4
+
+# (display name, module) in the order "Run ALL Modules" has always used.
+# Each module declares the shared_data keys it READS and WRITES.
+ALL_STAGES = [
+    ("Subdomain Enumeration", subdomain_enumeration),
+    ("DNS Resolution", dns_resolution_module),
+    ("Incremental Plan", incremental),
+    ("Certificate Analysis", cert_data_module),
+    ("Grid IP Harvester", grid_ip_harvester_module),
+    ("GitHub Search", github_search_module),
+    ("Shodan Scan", shodan_query_module),
+    ("Cloud Detection", cloud_detection_module),
+    ("Wayback JS", wayback_js_module),
+    ("Error Page Extraction", error_page_extraction_module),
+    ("Path Fuzzing", path_fuzzing_module),
+    ("Supply Chain Analysis", supply_chain_module),
+    ("Bucket Audit", bucket_audit_module),
+    ("ICS Exposure Detection", ics_exposure_module),
+    ("Screenshot Capture", screenshot_capture_module),
+]
+
+# Short names for selecting stages on the command line
+STAGE_ALIASES = {
+    "subdomains": "Subdomain Enumeration",
+    "dns": "DNS Resolution",
+    "incremental": "Incremental Plan",
+    "certs": "Certificate Analysis",
+    "grid": "Grid IP Harvester",
+    "github": "GitHub Search",
+    "shodan": "Shodan Scan",
+    "cloud": "Cloud Detection",
+    "wayback": "Wayback JS",
+    "errors": "Error Page Extraction",
+    "paths": "Path Fuzzing",
+    "supply": "Supply Chain Analysis",
+    "buckets": "Bucket Audit",
+    "ics": "ICS Exposure Detection",
+    "screenshots": "Screenshot Capture",
+}
+
+
+def select_stages(names, with_inputs=True):
+    """
+    Resolve aliases to stages in pipeline order. With with_inputs, stages that
+    produce keys the selected ones read are pulled in as well.
+    """
+    if not names or "all" in names:
+        return list(ALL_STAGES)
+    unknown = [n for n in names if n not in STAGE_ALIASES]
+    if unknown:
+        raise ValueError(f"Unknown module(s): {', '.join(unknown)}. Choose from: {', '.join(STAGE_ALIASES)}")
+    wanted = {STAGE_ALIASES[n] for n in names}
+    if with_inputs:
+        changed = True
+        while changed:
+            needed = set()
+            for name, module in ALL_STAGES:
+                if name in wanted:
+                    needed.update(getattr(module, "READS", []))
+            added = {name for name, module in ALL_STAGES
+                     if name not in wanted and needed & set(getattr(module, "WRITES", []))}
+            wanted |= added
+            changed = bool(added)
+    return [(name, module) for name, module in ALL_STAGES if name in wanted]
+
+
+class SharedData(dict):
+    """
+    The session dict, with writes serialized so modules running on
+    different threads can populate it at the same time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        with self.lock:
+            super().__delitem__(key)
+
+    def setdefault(self, key, default=None):
+        with self.lock:
+            return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        with self.lock:
+            super().update(*args, **kwargs)
+
+    def pop(self, key, *default):
+        with self.lock:
+            return super().pop(key, *default)
+
+
+def build_dependencies(stages):
+    """
+    A stage depends on every earlier stage that writes a key it reads, or
+    writes a key it also writes. Declaration order breaks ties, so the
+    graph is always acyclic.
+    """
+    deps = {}
+    for i, (name, module) in enumerate(stages):
+        reads = set(getattr(module, "READS", []))
+        writes = set(getattr(module, "WRITES", []))
+        deps[name] = set()
+        for earlier_name, earlier in stages[:i]:
+            earlier_writes = set(getattr(earlier, "WRITES", []))
+            if earlier_writes & (reads | writes):
+                deps[name].add(earlier_name)
+    return deps
+
+
+def critical_path(deps, durations):
+    finish = {}
+    previous = {}
+    for name in deps:  # deps is in declaration order, so parents come first
+        parent = max(deps[name], key=lambda d: finish[d], default=None)
+        finish[name] = durations.get(name, 0.0) + (finish[parent] if parent else 0.0)
+        previous[name] = parent
+    if not finish:
+        return [], 0.0
+    node = max(finish, key=finish.get)
+    total = finish[node]
+    path = []
+    while node:
+        path.append(node)
+        node = previous[node]
+    return list(reversed(path)), total
+
+
+def format_critical_path(path, durations, total):
+    steps = " -> ".join(f"{name} ({durations.get(name, 0.0):.1f}s)" for name in path)
+    return f"Critical path ({total:.1f}s): {steps}"
+
+
+def run_pipeline(stages, shared_data, runner, max_workers=None):
+    """
+    Run stages concurrently as soon as the stages they depend on have
+    finished. runner(name, func, shared_data) executes a single module.
+    Returns (durations, critical path, critical path seconds).
+    """
+    max_workers = max_workers or int(shared_data.get("pipeline_workers", DEFAULT_PIPELINE_WORKERS))
+    deps = build_dependencies(stages)
+    modules = dict(stages)
+    # Stages that can start on names as enumeration streams them in
+    prefetch.register(shared_data, modules.values())
+    durations = {}
+    done = set()
+    pending = [name for name, _ in stages]
+    running = {}
+
+    def timed(name):
+        start = time.monotonic()
+        try:
+            runner(name, modules[name].run, shared_data)
+        finally:
+            durations[name] = time.monotonic() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            for name in [n for n in pending if deps[n] <= done]:
+                pending.remove(name)
+                logging.info(f"Pipeline: starting {name}")
+                running[pool.submit(timed, name)] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done.add(running.pop(future))
+                future.result()
+
+    path, total = critical_path(deps, durations)
+    return durations, path, total
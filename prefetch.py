@@ -0,0 +1,74 @@
+import logging
+import queue
+import threading
+
+# Names handed to a hook per call while enumeration is still streaming them in
+PREFETCH_BATCH = 200
+
+
+def register(shared_data, modules):
+    """
+    Collect the PREFETCH hooks of the modules about to run. Enumeration feeds
+    each hook the names it discovers, so later stages find their DNS answers,
+    certificates and pages already fetched. A hook is hook(hosts, shared_data).
+    """
+    hooks = []
+    if shared_data.get("stream_prefetch", True):
+        for module in modules:
+            hook = getattr(module, "PREFETCH", None)
+            if hook is not None and hook not in hooks:
+                hooks.append(hook)
+    shared_data["_prefetch_hooks"] = hooks
+    return hooks
+
+
+def start(shared_data, batch=PREFETCH_BATCH):
+    """
+    Start one worker per registered hook. Returns (submit, close): submit(host)
+    queues a name for every hook and close() ends the stream.
+    """
+    hooks = shared_data.get("_prefetch_hooks") or []
+    queues = []
+    workers = shared_data.setdefault("_prefetch_workers", {})
+    for hook in hooks:
+        names = queue.Queue()
+        thread = threading.Thread(target=_work, args=(hook, names, shared_data, batch), daemon=True)
+        thread.start()
+        queues.append(names)
+        workers[hook] = thread
+
+    def submit(host):
+        for names in queues:
+            names.put(host)
+
+    def close():
+        for names in queues:
+            names.put(None)
+
+    return submit, close
+
+
+def wait(shared_data, hook):
+    """Block until the hook has handled every name it was given, if it ran at all."""
+    thread = (shared_data.get("_prefetch_workers") or {}).get(hook)
+    if thread is not None:
+        thread.join()
+
+
+def _work(hook, names, shared_data, batch):
+    done = False
+    while not done:
+        hosts = [names.get()]
+        while len(hosts) < batch:
+            try:
+                hosts.append(names.get_nowait())
+            except queue.Empty:
+                break
+        done = None in hosts
+        hosts = [h for h in hosts if h is not None]
+        if hosts:
+            try:
+                hook(hosts, shared_data)
+            except Exception as e:
+                # The stage itself handles whatever the prefetch missed
+                logging.warning(f"Prefetch of {len(hosts)} hosts by {hook.__module__}.{hook.__name__} failed: {e}")
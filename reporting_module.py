@@ -1,42 +1,85 @@
 import os
 import json
 import csv
+import gzip
 import logging
 from datetime import datetime
 from pathlib import Path
 from jinja2 import Template
+from incremental import build_delta
+from findings_db import export_findings, DEFAULT_DB_NAME
 
-def save_json_report(data, base_path):
-    out_path = base_path + ".json"
-    with open(out_path, "w") as f:
-        json.dump(data, f, indent=2)
+def _open_report(path, compress=False):
+    if compress:
+        return gzip.open(path + ".gz", "wt", newline="", encoding="utf-8"), path + ".gz"
+    return open(path, "w", newline="", encoding="utf-8"), path
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset, tuple)):
+        return sorted(value, key=str)
+    return str(value)
+
+def _to_cell(value):
+    if isinstance(value, (dict, list, tuple, set)):
+        return json.dumps(value, default=_json_default, separators=(",", ":"))
+    return value
+
+def iter_findings(data):
+    """
+    Yield one {"module", "key", "value"} record per finding, module by
+    module, without building any intermediate copy of the session.
+    """
+    for module, content in data.items():
+        if isinstance(content, dict):
+            for key, fields in content.items():
+                if isinstance(fields, list):
+                    for item in fields:
+                        yield {"module": module, "key": key, "value": item}
+                else:
+                    yield {"module": module, "key": key, "value": fields}
+        elif isinstance(content, list):
+            for idx, item in enumerate(content):
+                yield {"module": module, "key": f"item_{idx}", "value": item}
+        else:
+            yield {"module": module, "key": "", "value": content}
+
+def save_json_report(data, base_path, compress=False):
+    f, out_path = _open_report(base_path + ".json", compress)
+    encoder = json.JSONEncoder(indent=2, default=_json_default)
+    with f:
+        # iterencode hands back small chunks, so no module is ever held as one big string
+        f.write("{")
+        for i, (module, content) in enumerate(data.items()):
+            f.write(",\n  " if i else "\n  ")
+            f.write(json.dumps(module) + ": ")
+            for chunk in encoder.iterencode(content):
+                f.write(chunk.replace("\n", "\n  "))
+        f.write("\n}\n")
     logging.info(f"Saved JSON report to {out_path}")
     return out_path
 
-def save_csv_report(data, base_path):
-    out_path = base_path + ".csv"
-    with open(out_path, "w", newline="") as f:
+def save_jsonl_report(data, base_path, compress=False):
+    f, out_path = _open_report(base_path + ".jsonl", compress)
+    count = 0
+    with f:
+        for record in iter_findings(data):
+            f.write(json.dumps(record, default=_json_default) + "\n")
+            count += 1
+    logging.info(f"Saved JSONL report ({count} findings) to {out_path}")
+    return out_path
+
+def save_csv_report(data, base_path, compress=False):
+    f, out_path = _open_report(base_path + ".csv", compress)
+    with f:
         writer = csv.writer(f)
         writer.writerow(["Module", "Key", "Field", "Value"])
-        for module, content in data.items():
-            if isinstance(content, dict):
-                for key, fields in content.items():
-                    if isinstance(fields, list):
-                        for item in fields:
-                            for k, v in item.items():
-                                writer.writerow([module, key, k, v])
-                    elif isinstance(fields, dict):
-                        for k, v in fields.items():
-                            writer.writerow([module, key, k, v])
-                    else:
-                        writer.writerow([module, key, "", fields])
-            elif isinstance(content, list):
-                for idx, item in enumerate(content):
-                    if isinstance(item, dict):
-                        for k, v in item.items():
-                            writer.writerow([module, f"item_{idx}", k, v])
-                    else:
-                        writer.writerow([module, f"item_{idx}", "", item])
+        for record in iter_findings(data):
+            module, key, value = record["module"], record["key"], record["value"]
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    writer.writerow([module, key, k, _to_cell(v)])
+            else:
+                writer.writerow([module, key, "", _to_cell(value)])
     logging.info(f"Saved CSV report to {out_path}")
     return out_path
 
@@ -58,7 +101,39 @@ def save_html_report(data, base_path):
     </head>
     <body>
         <h1>Deep Recon Report</h1>
-        {% for module, results in data.items() %}
+        {% if data.delta %}
+            <h2>Changes since session {{ data.delta.previous_session }}</h2>
+            <table>
+                <thead><tr><th>Change</th><th>Host</th><th>Details</th></tr></thead>
+                <tbody>
+                {% for host in data.delta.appeared %}
+                    <tr><td>Appeared</td><td>{{ host }}</td><td></td></tr>
+                {% endfor %}
+                {% for host in data.delta.vanished %}
+                    <tr><td>Vanished</td><td>{{ host }}</td><td></td></tr>
+                {% endfor %}
+                {% for host, reasons in data.delta.changed.items() %}
+                    <tr><td>Changed</td><td>{{ host }}</td><td>{{ reasons | join("; ") }}</td></tr>
+                {% endfor %}
+                </tbody>
+            </table>
+        {% endif %}
+        {% if data.screenshot_clusters %}
+            <h2>Screenshots ({{ data.screenshot_clusters | length }} distinct pages)</h2>
+            <table>
+                <thead><tr><th>Screenshot</th><th>Hosts</th></tr></thead>
+                <tbody>
+                {% for cluster in data.screenshot_clusters %}
+                    <tr>
+                        <td><img src="{{ relpath(cluster.image) }}" width="320" alt="{{ cluster.representative }}"></td>
+                        <td>{{ cluster.representative }}{% if cluster.hosts | length > 1 %}
+                            and {{ cluster.hosts | length - 1 }} more: {{ cluster.hosts[1:] | join(", ") }}{% endif %}</td>
+                    </tr>
+                {% endfor %}
+                </tbody>
+            </table>
+        {% endif %}
+        {% for module, results in data.items() if module not in skip %}
             <h2>{{ module }}</h2>
             {% if results is mapping %}
                 <table>
@@ -108,9 +183,13 @@ def save_html_report(data, base_path):
     </html>
     """
     template = Template(html_template)
-    rendered = template.render(data=data)
-    with open(out_path, "w") as f:
-        f.write(rendered)
+    # Clustered screenshots get their own section with one image per distinct page
+    skip = {"delta", "screenshots", "screenshot_clusters"} if data.get("screenshot_clusters") else {"delta"}
+    report_dir = os.path.dirname(os.path.abspath(out_path))
+    # Stream the page to disk in rendered chunks instead of building it as one string
+    with open(out_path, "w", encoding="utf-8") as f:
+        template.stream(data=data, skip=skip,
+                        relpath=lambda p: os.path.relpath(os.path.abspath(p), report_dir)).dump(f)
     logging.info(f"Saved HTML report to {out_path}")
     return out_path
 
@@ -120,9 +199,20 @@ def generate_reports(shared_data, output_dir="output"):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_path = os.path.join(output_dir, f"{base}_{timestamp}")
 
+    # Keys starting with "_" hold session internals (caches, handles), not findings
+    report_data = {k: v for k, v in shared_data.items() if not k.startswith("_")}
+    delta = build_delta(shared_data)
+    if delta:
+        report_data = {"delta": delta, **report_data}
+
+    compress = bool(shared_data.get("report_compress"))
     paths = {
-        "html": save_html_report(shared_data, base_path),
-        "csv": save_csv_report(shared_data, base_path),
-        "json": save_json_report(shared_data, base_path)
+        "html": save_html_report(report_data, base_path),
+        "csv": save_csv_report(report_data, base_path, compress),
+        "jsonl": save_jsonl_report(report_data, base_path, compress),
+        "json": save_json_report(report_data, base_path, compress),
+        # One findings database per output directory accumulates every session written there
+        "sqlite": export_findings(report_data, shared_data.get("findings_db")
+                                  or os.path.join(output_dir, DEFAULT_DB_NAME))
     }
     return paths
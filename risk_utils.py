@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
+import argparse
+import json
 import requests
 import logging
 import re
-import sys
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from http_engine import fetch_all, cache_summary, READ_CHUNK
+from signatures import SignatureSet, DEFAULT_SCAN_BYTES
+from nvd_utils import get_nvd
+from cve_index import get_index
+from rate_limit import HostThrottle
+from html_document import parse_document
 
-CVE_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+DEFAULT_WORKERS = 10
+# Seconds between requests to the same host; different hosts are fetched in parallel
+DEFAULT_HOST_DELAY = 1.0
 
 
 def init_logging():
@@ -35,147 +44,164 @@ def load_targets(input_arg):
     return targets
 
 
+SUPPLY_CHAIN_KEYWORDS = {
+    "scada": "SCADA system indicator",
+    "plc": "PLC interface indicator",
+    "rtu": "RTU device indicator",
+    "hmi": "HMI (Human Machine Interface) detected",
+    "dcs": "DCS (Distributed Control System) detected",
+    "ics": "ICS (Industrial Control System) detected",
+    "ot": "Operational Technology (OT) interface detected",
+    "default password": "Potential default credential exposure",
+    "exposed device": "Exposed device interface found",
+
+    # Vendor and product indicators
+    "rockwell": "Rockwell Automation product mentioned",
+    "allen-bradley": "Allen-Bradley product mentioned",
+    "siemens": "Siemens control system reference",
+    "schneider": "Schneider Electric system reference",
+    "abb": "ABB industrial system reference",
+    "mitsubishi": "Mitsubishi PLC or ICS reference",
+    "honeywell": "Honeywell industrial device referenced",
+    "emerson": "Emerson control system reference",
+    "omron": "Omron PLC interface detected",
+    "yokogawa": "Yokogawa industrial device detected"
+}
+# Whole words only, so "ot" and "ics" don't fire inside "not" or "topics"
+SUPPLY_CHAIN_SIGNATURES = SignatureSet(literals=SUPPLY_CHAIN_KEYWORDS)
+# Identifiers in JS are usually camelCase (apiKey, authToken), so these match anywhere
+JS_SIGNATURES = SignatureSet(literals=["token", "apikey", "modbus", "plc", "vendor", "admin"], word_boundary=False)
+
+
 def scan_for_supply_chain(content):
-    findings = []
-    keywords = {
-        "scada": "SCADA system indicator",
-        "plc": "PLC interface indicator",
-        "rtu": "RTU device indicator",
-        "hmi": "HMI (Human Machine Interface) detected",
-        "dcs": "DCS (Distributed Control System) detected",
-        "ics": "ICS (Industrial Control System) detected",
-        "ot": "Operational Technology (OT) interface detected",
-        "default password": "Potential default credential exposure",
-        "exposed device": "Exposed device interface found",
-
-        # Vendor and product indicators
-        "rockwell": "Rockwell Automation product mentioned",
-        "allen-bradley": "Allen-Bradley product mentioned",
-        "siemens": "Siemens control system reference",
-        "schneider": "Schneider Electric system reference",
-        "abb": "ABB industrial system reference",
-        "mitsubishi": "Mitsubishi PLC or ICS reference",
-        "honeywell": "Honeywell industrial device referenced",
-        "emerson": "Emerson control system reference",
-        "omron": "Omron PLC interface detected",
-        "yokogawa": "Yokogawa industrial device detected"
-    }
-    content_lower = content.lower()
-    for key, message in keywords.items():
-        if key in content_lower:
-            findings.append((key, message))
-    return list(set(findings))
+    return sorted({(key, SUPPLY_CHAIN_KEYWORDS[key]) for key, _ in SUPPLY_CHAIN_SIGNATURES.scan(content)})
 
 
 def extract_embedded_code(html):
     embedded = []
-    try:
-        soup = BeautifulSoup(html, 'html.parser')
-        for script in soup.find_all("script"):
-            if script.string:
-                code = script.string.strip()
-                if any(x in code.lower() for x in ["modbus", "bacnet", "opc", "mqtt", "ladder", "firmware"]):
-                    embedded.append(code[:200])
-    except Exception as e:
-        logging.error(f"Error parsing embedded scripts: {e}")
+    for script in parse_document(html).inline_scripts:
+        code = script.strip()
+        if any(x in code.lower() for x in ["modbus", "bacnet", "opc", "mqtt", "ladder", "firmware"]):
+            embedded.append(code[:200])
     return embedded
 
 
 def extract_js_config_links(html, base_url):
     js_links = []
-    try:
-        soup = BeautifulSoup(html, 'html.parser')
-        for script in soup.find_all("script", src=True):
-            src = script['src']
-            full_url = urljoin(base_url, src)
-            if any(x in src.lower() for x in ["config", "settings", "init", "firmware"]):
-                js_links.append(full_url)
-    except Exception as e:
-        logging.error(f"Error extracting JavaScript config links: {e}")
+    for src in parse_document(html).script_srcs:
+        if any(x in src.lower() for x in ["config", "settings", "init", "firmware"]):
+            js_links.append(urljoin(base_url, src))
     return js_links
 
 
-def download_and_check_js(js_urls):
+def host_of(url):
+    return urlparse(url if "://" in url else f"//{url}").hostname or url
+
+
+def download_and_check_js(js_urls, max_bytes=DEFAULT_SCAN_BYTES, throttle=None):
     embedded_indicators = []
     for js_url in js_urls:
         try:
-            response = requests.get(js_url, timeout=10)
-            if response.status_code == 200:
-                code = response.text.lower()
-                if any(x in code for x in ["token", "apikey", "modbus", "plc", "vendor", "admin"]):
-                    embedded_indicators.append((js_url, code[:150]))
+            if throttle is not None:
+                throttle.wait(host_of(js_url))
+            # Bundles are scanned as they download, up to max_bytes, instead of loaded whole
+            with requests.get(js_url, timeout=10, stream=True) as response:
+                if response.status_code == 200:
+                    scanner = JS_SIGNATURES.scanner(max_bytes, response.encoding or "utf-8")
+                    for chunk in response.iter_content(READ_CHUNK):
+                        scanner.feed_bytes(chunk)
+                        if scanner.full:
+                            break
+                    if scanner.close():
+                        embedded_indicators.append((js_url, scanner.head[:150].lower()))
         except Exception as e:
             logging.error(f"Error fetching or analyzing JS from {js_url}: {e}")
     return embedded_indicators
 
 
-def query_cves(keyword):
-    try:
-        params = {
-            "keywordSearch": keyword,
-            "resultsPerPage": 3
-        }
-        response = requests.get(CVE_API_URL, params=params, timeout=10)
-        if response.status_code == 200:
-            results = response.json()
-            return [item["cve"] for item in results.get("vulnerabilities", []) if "cve" in item]
-    except Exception as e:
-        logging.error(f"Error fetching CVEs for keyword '{keyword}': {e}")
-    return []
-
-
-def run_supply_chain_detection(input_arg):
+def query_cves(keyword, shared_data=None):
+    # An imported offline index answers locally; otherwise NVD is asked, deduplicated,
+    # disk-cached and rate-limited so repeat keywords across targets cost nothing
+    index = get_index(shared_data)
+    if index is not None:
+        return index.search(keyword)
+    return get_nvd(shared_data).keyword_search(keyword)
+
+
+def check_target(target, shared_data, throttle=None):
+    throttle = throttle or HostThrottle(0)
+    throttle.wait(host_of(target))
+    response = fetch_all([target], shared_data, timeout=15)[target]
+    if "error" in response:
+        raise ConnectionError(response.get("detail", response["error"]))
+    html = response["text"]
+    raw_findings = scan_for_supply_chain(html)
+    findings = [msg for _, msg in raw_findings]
+    embedded_snippets = extract_embedded_code(html)
+    js_config_links = extract_js_config_links(html, target)
+    js_indicators = download_and_check_js(js_config_links, throttle=throttle)
+
+    cve_results = {}
+    for key, _ in raw_findings:
+        cves = query_cves(key, shared_data)
+        if cves:
+            cve_results[key] = cves
+
+    if embedded_snippets:
+        findings.append(f"Embedded industrial-related code detected: {len(embedded_snippets)} snippet(s)")
+    if js_indicators:
+        findings.append(f"Exposed config/firmware JavaScript detected: {len(js_indicators)} file(s)")
+
+    return {
+        "indicators": findings,
+        "embedded_code_snippets": embedded_snippets,
+        "js_config_indicators": js_indicators,
+        "cves": cve_results
+    }
+
+
+def run_supply_chain_detection(input_arg, shared_data=None, workers=DEFAULT_WORKERS,
+                               host_delay=DEFAULT_HOST_DELAY, on_result=None):
+    """
+    Check every target with up to `workers` in parallel. Requests to one host
+    are spaced host_delay seconds apart. on_result(target, findings) is called
+    as each target finishes, in completion order.
+    """
     init_logging()
-    targets = load_targets(input_arg)
+    # Reuse the recon session's response cache when called from one
+    shared_data = shared_data if shared_data is not None else {}
+    targets = list(dict.fromkeys(load_targets(input_arg)))
+    throttle = HostThrottle(host_delay)
     all_findings = {}
-    for target in targets:
-        print(f"\n[Supply Chain Detection] Processing target: {target}")
-        try:
-            response = requests.get(target, timeout=15)
-            raw_findings = scan_for_supply_chain(response.text)
-            findings = [msg for _, msg in raw_findings]
-            embedded_snippets = extract_embedded_code(response.text)
-            js_config_links = extract_js_config_links(response.text, target)
-            js_indicators = download_and_check_js(js_config_links)
-
-            cve_results = {}
-            for key, _ in raw_findings:
-                cves = query_cves(key)
-                if cves:
-                    cve_results[key] = cves
-
-            if embedded_snippets:
-                findings.append(f"Embedded industrial-related code detected: {len(embedded_snippets)} snippet(s)")
-            if js_indicators:
-                findings.append(f"Exposed config/firmware JavaScript detected: {len(js_indicators)} file(s)")
-
-            if findings:
-                print(f"Findings: {', '.join(findings)}")
-            else:
-                print("No supply chain or exposed device indicators detected.")
-
-            all_findings[target] = {
-                "indicators": findings,
-                "embedded_code_snippets": embedded_snippets,
-                "js_config_indicators": js_indicators,
-                "cves": cve_results
-            }
-        except Exception as e:
-            logging.error(f"Error processing {target}: {e}")
-            print(f"Error processing {target}: {e}")
-        time.sleep(1)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets) or 1))) as pool:
+        futures = {pool.submit(check_target, target, shared_data, throttle): target for target in targets}
+        for future in as_completed(futures):
+            target = futures[future]
+            try:
+                all_findings[target] = future.result()
+            except Exception as e:
+                logging.error(f"Error processing {target}: {e}")
+                print(f"Error processing {target}: {e}")
+                continue
+            if on_result:
+                on_result(target, all_findings[target])
+    summary = cache_summary(shared_data)
+    if summary:
+        logging.info(summary)
+    nvd = get_nvd(shared_data).stats()
+    logging.info(f"NVD lookups: {nvd['keywords']} distinct keywords, {nvd['requests']} requests, "
+                 f"{nvd['cache_hits']} served from disk cache")
     return all_findings
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 supply_chain_module.py <target_or_targets_file>")
-        sys.exit(1)
-    input_arg = sys.argv[1]
-    findings = run_supply_chain_detection(input_arg)
-    print("\n=== Supply Chain Detection Summary ===")
-    for t, result in findings.items():
+_print_lock = threading.Lock()
+
+
+def print_result(t, result):
+    with _print_lock:
         print(f"\n{t}:")
+        if not result["indicators"]:
+            print("  No supply chain or exposed device indicators detected.")
         for f in result["indicators"]:
             print(f"  - {f}")
         if result["cves"]:
@@ -193,5 +219,34 @@ def main():
                 print(f"    [URL] {js_url}\n    [Snippet] {snippet[:100]}...")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Supply chain and exposed device detection.")
+    parser.add_argument("input", help="target URL, or a .txt file with one target per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"targets checked in parallel (default {DEFAULT_WORKERS})")
+    parser.add_argument("--host-delay", type=float, default=DEFAULT_HOST_DELAY,
+                        help=f"seconds between requests to the same host (default {DEFAULT_HOST_DELAY})")
+    parser.add_argument("--output", help="append each target's findings to this JSON Lines file as it completes")
+    args = parser.parse_args()
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else None
+
+    def report(target, result):
+        print_result(target, result)
+        if out:
+            with _print_lock:
+                out.write(json.dumps({"target": target, **result}, default=str) + "\n")
+                out.flush()
+
+    print("=== Supply Chain Detection ===")
+    try:
+        findings = run_supply_chain_detection(args.input, workers=args.workers,
+                                              host_delay=args.host_delay, on_result=report)
+    finally:
+        if out:
+            out.close()
+    print(f"\n{len(findings)} target(s) checked.")
+
+
 if __name__ == "__main__":
     main()
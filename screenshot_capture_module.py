@@ -1,35 +1,117 @@
 
 import subprocess
+import hashlib
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import ask_fast_mode
+from incremental import probe_targets, carry_forward
+from http_engine import fetch_all, prefetch_pages
 
-def run_screenshot_capture(domains):
-    output_dir = "screenshots"
+try:
+    from PIL import Image
+except ImportError:  # optional; without it only byte-identical screenshots are grouped
+    Image = None
+
+READS = ["subdomains", "cert_domains", "incremental_plan"]
+WRITES = ["screenshots", "screenshot_clusters"]
+# Pages are fetched into the session cache while enumeration runs
+PREFETCH = prefetch_pages
+
+FAST_MODE_LIMIT = 100
+DEFAULT_SCREENSHOT_WORKERS = 4
+CAPTURE_TIMEOUT = 30
+LIVENESS_TIMEOUT = 5
+# Screenshots whose 64-bit difference hashes differ in at most this many bits are the same page
+CLUSTER_DISTANCE = 4
+
+def live_urls(domains, shared_data=None):
+    """
+    {domain: url} for hosts that answer HTTPS, or plain HTTP when HTTPS fails.
+    Probes share the session's response cache, so hosts other modules
+    already fetched are not requested again.
+    """
+    responses = fetch_all([f"https://{d}" for d in domains], shared_data, timeout=LIVENESS_TIMEOUT)
+    live = {d: f"https://{d}" for d in domains if "error" not in responses[f"https://{d}"]}
+    fallback = [d for d in domains if d not in live]
+    if fallback:
+        responses = fetch_all([f"http://{d}" for d in fallback], shared_data, timeout=LIVENESS_TIMEOUT)
+        live.update({d: f"http://{d}" for d in fallback if "error" not in responses[f"http://{d}"]})
+    return {d: live[d] for d in domains if d in live}
+
+def capture(domain, url, output_dir):
+    outfile = os.path.join(output_dir, f"{domain}.png")
+    try:
+        cmd = ["gowitness", "single", "--url", url, "--destination", outfile]
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=CAPTURE_TIMEOUT)
+    except Exception as e:
+        logging.warning(f"Screenshot failed for {domain}: {e}")
+        return None
+    return outfile if os.path.exists(outfile) else None
+
+def run_screenshot_capture(domains, output_dir="screenshots", workers=DEFAULT_SCREENSHOT_WORKERS, urls=None):
+    """Capture every domain with up to `workers` gowitness processes running at once."""
     os.makedirs(output_dir, exist_ok=True)
+    urls = urls or {d: f"https://{d}" for d in domains}
     result_paths = {}
 
-    for domain in domains:
-        url = f"https://{domain}"
-        outfile = os.path.join(output_dir, f"{domain}.png")
-        try:
-            cmd = ["gowitness", "single", "--url", url, "--destination", outfile]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
-            if os.path.exists(outfile):
-                result_paths[domain] = outfile
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(capture, d, urls[d], output_dir): d for d in domains}
+        for future in as_completed(futures):
+            domain = futures[future]
+            path = future.result()
+            if path:
+                result_paths[domain] = path
                 logging.info(f"Screenshot saved for {domain}")
+    return {d: result_paths[d] for d in domains if d in result_paths}
+
+def image_hash(path):
+    """64-bit difference hash of the image, or the file's SHA-1 without Pillow."""
+    if Image is None:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    with Image.open(path) as img:
+        pixels = list(img.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+def cluster_screenshots(screenshots, distance=CLUSTER_DISTANCE):
+    """
+    Group screenshots of the same page (default server pages, parking pages)
+    and return clusters largest first, each as {"hash", "representative",
+    "image", "hosts"}.
+    """
+    clusters = []
+    for domain, path in sorted(screenshots.items()):
+        try:
+            digest = image_hash(path)
         except Exception as e:
-            logging.warning(f"Screenshot failed for {domain}: {e}")
-    return result_paths
+            logging.warning(f"Could not hash screenshot {path}: {e}")
+            continue
+        value = int(digest, 16) if Image is not None else None
+        for cluster in clusters:
+            if cluster["hash"] == digest or (value is not None and
+                                             bin(cluster["_value"] ^ value).count("1") <= distance):
+                cluster["hosts"].append(domain)
+                break
+        else:
+            clusters.append({"hash": digest, "_value": value, "representative": domain, "image": path,
+                             "hosts": [domain]})
+    clusters.sort(key=lambda c: -len(c["hosts"]))
+    for cluster in clusters:
+        del cluster["_value"]
+    return clusters
 
 def run(shared_data):
 
-    from rich.prompt import Prompt
     from rich.console import Console
-    import time
 
     console = Console()
     console.print("\n[bold cyan]Choose Screenshot Capture Module.Py Mode:[/bold cyan]")
-    fast_mode = Prompt.ask("Run in fast mode? (limits to 100 items)", choices=["y", "n"], default="y") == "y"
+    fast_mode = ask_fast_mode(shared_data, f"Run in fast mode? (limits to {FAST_MODE_LIMIT} items)")
     verbose_mode = not fast_mode
     subdomains = shared_data.get("subdomains") or shared_data.get("cert_domains") or []
     if not subdomains:
@@ -42,6 +124,18 @@ def run(shared_data):
         logging.warning("No subdomains to screenshot.")
         return {}
 
-    screenshots = run_screenshot_capture(subdomains)
+    targets = probe_targets(shared_data, subdomains)
+    # Hosts without a web listener would only burn a capture timeout each
+    urls = live_urls(targets, shared_data)
+    targets = list(urls)[:FAST_MODE_LIMIT] if fast_mode else list(urls)
+    logging.info(f"{len(urls)} of {len(subdomains)} hosts answer HTTP(S); capturing {len(targets)}")
+
+    output_dir = os.path.join(shared_data.get("output_dir", "."), "screenshots")
+    workers = int(shared_data.get("screenshot_workers", DEFAULT_SCREENSHOT_WORKERS))
+    screenshots = run_screenshot_capture(targets, output_dir, workers, urls)
+    screenshots = carry_forward(shared_data, "screenshots", screenshots)
+    clusters = cluster_screenshots(screenshots)
+    logging.info(f"{len(screenshots)} screenshots in {len(clusters)} distinct pages")
     shared_data["screenshots"] = screenshots
-    return screenshots
\ No newline at end of file
+    shared_data["screenshot_clusters"] = clusters
+    return screenshots
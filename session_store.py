@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.getenv("DEEP_RECON_SESSION_DB", os.path.join("sessions", "deep_recon.db"))
+
+# Target details that identify a session, saved alongside module output
+SESSION_INPUTS = [
+    "root_domain", "company_name", "organization_name", "origin_registrant",
+    "prefix_registrant", "report_filename", "fast_mode", "verbose_mode", "incremental_mode"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    root_domain TEXT,
+    created_at REAL,
+    updated_at REAL,
+    inputs TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_domain ON sessions(root_domain, updated_at);
+CREATE TABLE IF NOT EXISTS module_results (
+    session_id TEXT,
+    module TEXT,
+    completed_at REAL,
+    data TEXT,
+    PRIMARY KEY (session_id, module)
+);
+CREATE TABLE IF NOT EXISTS host_progress (
+    session_id TEXT,
+    module TEXT,
+    host TEXT,
+    completed_at REAL,
+    result TEXT,
+    PRIMARY KEY (session_id, module, host)
+);
+"""
+
+
+class SessionStore:
+    """
+    SQLite-backed checkpoints for recon sessions: the output of every
+    completed module, plus per-host progress inside long-running modules.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _write(self, sql, params):
+        with self._lock:
+            self.conn.execute(sql, params)
+            self.conn.commit()
+
+    def create_session(self, inputs):
+        session_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        now = time.time()
+        self._write("INSERT INTO sessions (id, root_domain, created_at, updated_at, inputs) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, inputs.get("root_domain"), now, now, json.dumps(inputs, default=str)))
+        return session_id
+
+    def update_inputs(self, session_id, inputs):
+        self._write("UPDATE sessions SET root_domain = ?, updated_at = ?, inputs = ? WHERE id = ?",
+                    (inputs.get("root_domain"), time.time(), json.dumps(inputs, default=str), session_id))
+
+    def save_module(self, session_id, module, data):
+        self._write("INSERT OR REPLACE INTO module_results (session_id, module, completed_at, data) VALUES (?, ?, ?, ?)",
+                    (session_id, module, time.time(), json.dumps(data, default=str)))
+
+    def save_host(self, session_id, module, host, result):
+        self._write("INSERT OR REPLACE INTO host_progress (session_id, module, host, completed_at, result) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, module, host, time.time(), json.dumps(result, default=str)))
+
+    def load_hosts(self, session_id, module):
+        with self._lock:
+            rows = self.conn.execute("SELECT host, result FROM host_progress WHERE session_id = ? AND module = ?",
+                                     (session_id, module)).fetchall()
+        return {host: json.loads(result) for host, result in rows}
+
+    def load_session(self, session_id):
+        """Return (inputs, merged module output, {module: completed_at}) or None."""
+        with self._lock:
+            row = self.conn.execute("SELECT inputs FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            modules = self.conn.execute(
+                "SELECT module, completed_at, data FROM module_results WHERE session_id = ? ORDER BY completed_at",
+                (session_id,)).fetchall()
+        data = {}
+        completed = {}
+        for module, completed_at, blob in modules:
+            data.update(json.loads(blob))
+            completed[module] = completed_at
+        return json.loads(row[0]), data, completed
+
+    def list_sessions(self, root_domain=None, limit=20):
+        sql = ("SELECT s.id, s.root_domain, s.updated_at, COUNT(m.module) FROM sessions s "
+               "LEFT JOIN module_results m ON m.session_id = s.id ")
+        params = []
+        if root_domain:
+            sql += "WHERE s.root_domain = ? "
+            params.append(root_domain)
+        sql += "GROUP BY s.id ORDER BY s.updated_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def session_inputs(shared_data):
+    return {k: shared_data[k] for k in SESSION_INPUTS if k in shared_data}
+
+
+def start_session(shared_data, store=None):
+    store = store or SessionStore()
+    shared_data["_session_store"] = store
+    shared_data["session_id"] = store.create_session(session_inputs(shared_data))
+    shared_data.setdefault("_completed_modules", {})
+    logging.info(f"Recording session {shared_data['session_id']} in {store.path}")
+    return shared_data["session_id"]
+
+
+def resume_session(shared_data, session_id, store=None):
+    store = store or SessionStore()
+    loaded = store.load_session(session_id)
+    if loaded is None:
+        return False
+    inputs, data, completed = loaded
+    shared_data.update(inputs)
+    shared_data.update(data)
+    shared_data["_session_store"] = store
+    shared_data["session_id"] = session_id
+    shared_data["_completed_modules"] = completed
+    logging.info(f"Resumed session {session_id}: {len(completed)} modules already complete")
+    return True
+
+
+def module_key(func):
+    return getattr(func, "__module__", None) or getattr(func, "__name__", "unknown")
+
+
+def checkpoint(shared_data, func):
+    """Persist the keys the finished module declares in WRITES."""
+    store = shared_data.get("_session_store")
+    if store is None:
+        return
+    key = module_key(func)
+    module = sys.modules.get(key)
+    writes = getattr(module, "WRITES", [])
+    data = {k: shared_data[k] for k in writes if k in shared_data}
+    store.update_inputs(shared_data["session_id"], session_inputs(shared_data))
+    store.save_module(shared_data["session_id"], key, data)
+    shared_data.setdefault("_completed_modules", {})[key] = time.time()
+
+
+def is_complete(shared_data, module):
+    return module.__name__ in shared_data.get("_completed_modules", {})
+
+
+def load_progress(shared_data, module):
+    """Per-host results a long-running module already finished in this session."""
+    store = shared_data.get("_session_store")
+    if store is None:
+        return {}
+    return store.load_hosts(shared_data["session_id"], module)
+
+
+def save_progress(shared_data, module, host, result):
+    store = shared_data.get("_session_store")
+    if store is not None:
+        store.save_host(shared_data["session_id"], module, host, result)
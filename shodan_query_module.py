@@ -1,21 +1,19 @@
 import shodan
-import socket
 import logging
 import os
-from utils import get_api_key  
+from dns_resolution_module import ensure_resolved, group_by_ip
+from shodan_utils import get_api
+from incremental import probe_targets, carry_forward
+from ip_index import grid_index, grid_tag
 
-def resolve_to_ip(hostname):
-    try:
-        return socket.gethostbyname(hostname)
-    except Exception as e:
-        logging.warning(f"Could not resolve {hostname} to IP: {e}")
-        return None
+READS = ["subdomains", "dns_records", "grid_cidrs", "incremental_plan"]
+WRITES = ["shodan_results"]
 
 def run(shared_data):
     logging.info("Running Shodan Query Module")
 
-    api_key = get_api_key("SHODAN_API_KEY")  
-    if not api_key:
+    api = get_api(shared_data)
+    if not api:
         logging.error("No SHODAN_API_KEY found.")
         return {}
 
@@ -24,25 +22,31 @@ def run(shared_data):
         logging.warning("No subdomains found in shared_data.")
         return {}
 
-    api = shodan.Shodan(api_key)
     results = {}
 
-    for host in subdomains:
-        ip = resolve_to_ip(host)
-        if not ip:
-            continue
+    # Many subdomains share a CDN or load balancer address; query each IP once
+    # and hand the same host record to every name behind it.
+    ip_groups = group_by_ip(ensure_resolved(shared_data, probe_targets(shared_data, subdomains)))
+    logging.info(f"{len(subdomains)} subdomains map to {len(ip_groups)} unique IPs")
+    grid = grid_index(shared_data)
 
+    for ip, hosts in ip_groups.items():
         try:
             response = api.host(ip)
-            results[host] = {
-                "ip": ip,
-                "data": response
-            }
-            logging.info(f"Retrieved Shodan data for {host} ({ip})")
+            # Set when the address lies in a block harvested for the utility's own ASNs
+            in_grid = grid_tag(grid, ip)
+            for host in hosts:
+                results[host] = {
+                    "ip": ip,
+                    "data": response,
+                    "in_grid": in_grid
+                }
+            logging.info(f"Retrieved Shodan data for {ip} ({', '.join(hosts)})")
         except shodan.APIError as e:
-            logging.warning(f"Shodan API error for {host}: {e}")
+            logging.warning(f"Shodan API error for {ip}: {e}")
         except Exception as e:
-            logging.error(f"Unexpected error during Shodan query for {host}: {e}")
+            logging.error(f"Unexpected error during Shodan query for {ip}: {e}")
 
+    results = carry_forward(shared_data, "shodan_results", results)
     shared_data["shodan_results"] = results
     return results
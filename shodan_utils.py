@@ -4,16 +4,123 @@ def get_api_key(key):
 
 
 import os
+import time
 import logging
+import threading
+from concurrent.futures import Future
 import shodan
+from disk_cache import DiskCache
+from rate_limit import TokenBucket
 
+SHODAN_RATE = 1.0  # requests per second allowed by the API
+SHODAN_CACHE_TTL = int(os.getenv("SHODAN_CACHE_TTL", 24 * 3600))
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
 
-def get_api():
+_client = None
+_client_lock = threading.Lock()
+
+
+def is_rate_limit_error(error):
+    message = str(error).lower()
+    return "rate limit" in message or "429" in message
+
+
+class ShodanClient:
+    """
+    One Shodan client for the whole process. Every call shares a token
+    bucket, rate-limit errors are retried with exponential backoff, and
+    host/search/asn responses are cached on disk for cache_ttl seconds.
+    Concurrent calls for the same key wait for the first one's answer
+    instead of each spending a request.
+    Set SHODAN_API_URL to point the client at a local stand-in.
+    """
+
+    def __init__(self, api_key, cache_ttl=SHODAN_CACHE_TTL, rate=SHODAN_RATE):
+        self.api = shodan.Shodan(api_key)
+        # The library throttles per instance only; the shared bucket replaces it
+        self.api.api_rate_limit = 0
+        self.bucket = TokenBucket(rate)
+        self.cache = DiskCache("shodan", cache_ttl)
+        self.calls = 0
+        self.cache_hits = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _call(self, kind, key, func, *args, **kwargs):
+        cache_key = f"{kind}:{key}"
+        with self._lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[cache_key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(self._fetch(cache_key, kind, key, func, *args, **kwargs))
+        except Exception as e:
+            # Waiters get the same error, e.g. "No information available"
+            future.set_exception(e)
+        finally:
+            # Later calls are answered by the disk cache, which honours the TTL
+            with self._lock:
+                del self._inflight[cache_key]
+        return future.result()
+
+    def _fetch(self, cache_key, kind, key, func, *args, **kwargs):
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.cache_hits += 1
+            if isinstance(cached, dict) and "__error__" in cached:
+                raise shodan.APIError(cached["__error__"])
+            return cached
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.bucket.acquire()
+            self.calls += 1
+            try:
+                result = func(*args, **kwargs)
+                break
+            except shodan.APIError as e:
+                if is_rate_limit_error(e) and attempt < MAX_RETRIES:
+                    delay = BACKOFF_BASE ** attempt
+                    logging.warning(f"Shodan rate limit hit on {kind} {key}, retrying in {delay:.0f}s")
+                    time.sleep(delay)
+                    continue
+                # "No information available" is an answer too; cache it so reruns skip the IP
+                if kind == "host" and "no information" in str(e).lower():
+                    self.cache.set(cache_key, {"__error__": str(e)})
+                raise
+
+        self.cache.set(cache_key, result)
+        return result
+
+    def host(self, ip):
+        return self._call("host", ip, self.api.host, ip)
+
+    def search(self, query, limit=100):
+        return self._call("search", f"{query}|{limit}", self.api.search, query, limit=limit)
+
+    def asn(self, asn):
+        asn = str(asn).upper().lstrip("AS")
+        return self._call("asn", asn, self.api.search, f"asn:AS{asn}", limit=100)
+
+
+def get_api(shared_data=None):
+    global _client
     api_key = get_api_key("SHODAN_API_KEY")
     if not api_key:
         logging.error("SHODAN_API_KEY not found in environment.")
         return None
-    return shodan.Shodan(api_key)
+    ttl = int((shared_data or {}).get("shodan_cache_ttl", SHODAN_CACHE_TTL))
+    # Batch runs split the account's request budget across worker processes
+    rate = float((shared_data or {}).get("shodan_rate", SHODAN_RATE))
+    with _client_lock:
+        if _client is None or _client.api.api_key != api_key:
+            _client = ShodanClient(api_key, cache_ttl=ttl, rate=rate)
+        _client.cache.ttl = ttl
+        _client.bucket.rate = rate
+    return _client
 
 def shodan_search(query, limit=100):
     api = get_api()
@@ -33,7 +140,7 @@ def shodan_get_asn(asn):
         return {}
 
     try:
-        return api.asn(f"AS{asn}")
+        return api.asn(asn)
     except Exception as e:
         logging.error(f"Shodan ASN lookup failed for AS{asn}: {e}")
-        return {}
\ No newline at end of file
+        return {}
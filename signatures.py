@@ -0,0 +1,142 @@
+import codecs
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # optional; without it each literal is checked with a plain substring search
+    ahocorasick = None
+
+DEFAULT_SCAN_BYTES = 2 * 1024 * 1024
+# Text kept from the previous chunk so matches straddling a chunk boundary are still seen
+OVERLAP = 4096
+# Matches ending this close to the end of a non-final buffer wait for more context
+GUARD = 64
+# Below this many literals, one C-level substring search each beats walking the automaton in Python
+AUTOMATON_MIN_LITERALS = 12
+
+
+# ASCII punctuation and whitespace all become one separator for whole-word matching
+_SEPARATORS = str.maketrans({chr(c): " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")})
+
+
+class SignatureSet:
+    """
+    Keyword and regex signatures matched in one pass over the text.
+
+    Literals are matched case-insensitively, with an Aho-Corasick automaton
+    when there are enough of them and pyahocorasick is installed, otherwise
+    with one substring search per literal. With word_boundary, text and literals are first normalized so
+    punctuation and whitespace become single spaces, and literals are only
+    matched between them. Each regex signature may list anchor literals it
+    cannot match without; the regex only runs on text containing one of them.
+    """
+
+    def __init__(self, literals=None, patterns=None, anchors=None, word_boundary=True):
+        self.literals = list(dict.fromkeys(k.lower() for k in (literals or [])))
+        self.patterns = {name: re.compile(p, re.IGNORECASE) for name, p in (patterns or {}).items()}
+        self.anchors = {name: [a.lower() for a in anchors[name]] for name in (anchors or {}) if name in self.patterns}
+        self.word_boundary = word_boundary
+        # What is actually searched for in the normalized text, mapped back to the literal
+        if word_boundary:
+            self._needles = {f" {k.translate(_SEPARATORS)} ": k for k in self.literals}
+        else:
+            self._needles = {k: k for k in self.literals}
+        self._automaton = None
+        if ahocorasick is not None and len(self._needles) >= AUTOMATON_MIN_LITERALS:
+            self._automaton = ahocorasick.Automaton()
+            for needle, literal in self._needles.items():
+                self._automaton.add_word(needle, (needle, literal))
+            self._automaton.make_automaton()
+
+    def _literal_hits(self, lowered, skip, limit):
+        if not self._needles:
+            return set()
+        if self.word_boundary:
+            # A needle starting at subject[i] covers the literal starting at lowered[i]
+            subject, offset = " " + lowered.translate(_SEPARATORS) + " ", 1
+        else:
+            subject, offset = lowered, 0
+        found = set()
+        if self._automaton is not None:
+            for last, (needle, literal) in self._automaton.iter(subject):
+                start = last + 1 - len(needle)
+                if start >= skip and last + 1 - 2 * offset <= limit:
+                    found.add(literal)
+            return found
+        for needle, literal in self._needles.items():
+            start = subject.find(needle, skip)
+            if start != -1 and start + len(needle) - 2 * offset <= limit:
+                found.add(literal)
+        return found
+
+    def search(self, text, final=True, skip=0):
+        """
+        Yield (signature, matched text) for every match in text. Matches
+        starting before skip, or ending within GUARD of the end of a
+        non-final buffer, are left for the neighbouring buffer to report.
+        """
+        limit = len(text) if final else len(text) - GUARD
+        lowered = text.lower()
+        for literal in self._literal_hits(lowered, skip, limit):
+            yield literal, literal
+        for name, pattern in self.patterns.items():
+            if name in self.anchors and not any(a in lowered for a in self.anchors[name]):
+                continue
+            for m in pattern.finditer(text, skip):
+                if m.end() <= limit:
+                    yield name, m.group(0)
+
+    def scan(self, text, max_chars=None):
+        return set(self.search(text if max_chars is None else text[:max_chars]))
+
+    def scanner(self, max_bytes=DEFAULT_SCAN_BYTES, encoding="utf-8"):
+        return Scanner(self, max_bytes, encoding)
+
+
+class Scanner:
+    """
+    Incremental scan over a body arriving in chunks. Only the current chunk
+    and a short overlap are held in memory, and input past max_bytes is ignored.
+    """
+
+    def __init__(self, signatures, max_bytes=DEFAULT_SCAN_BYTES, encoding="utf-8"):
+        self.signatures = signatures
+        self.max_bytes = max_bytes
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.bytes_read = 0
+        self.hits = set()
+        self.head = ""
+        self._tail = ""
+        self._skip = 0
+
+    @property
+    def full(self):
+        return self.max_bytes is not None and self.bytes_read >= self.max_bytes
+
+    def feed_bytes(self, data):
+        if self.full:
+            return
+        if self.max_bytes is not None:
+            data = data[:self.max_bytes - self.bytes_read]
+        self.bytes_read += len(data)
+        self.feed(self._decoder.decode(data))
+
+    def feed(self, text):
+        if not text:
+            return
+        if len(self.head) < 256:
+            self.head += text[:256 - len(self.head)]
+        buffer = self._tail + text
+        self.hits.update(self.signatures.search(buffer, final=False, skip=self._skip))
+        self._tail = buffer[-OVERLAP:]
+        # The first character of a carried-over tail only provides context for the next match
+        self._skip = 1 if len(buffer) > OVERLAP else 0
+
+    def close(self):
+        buffer = self._tail + self._decoder.decode(b"", final=True)
+        self.hits.update(self.signatures.search(buffer, final=True, skip=self._skip))
+        self._tail = ""
+        return self.hits
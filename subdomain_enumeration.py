@@ -1,53 +1,128 @@
 import subprocess
 import logging
+import queue
+import threading
+import time
+import prefetch
 
-def run_subdomain_enumeration(domain, shared_data, tool='subfinder'):
-    logging.info(f"Starting subdomain enumeration on: {domain} using {tool}")
-    
-    if tool.lower() == 'subfinder':
-        cmd = ['subfinder', '-d', domain, '-silent']
-    elif tool.lower() == 'assetfinder':
-        cmd = ['assetfinder', '--subs-only', domain]
-    else:
-        logging.warning(f"Unknown tool {tool}, defaulting to subfinder.")
-        cmd = ['subfinder', '-d', domain, '-silent']
+READS = ["root_domain", "enum_timeout"]
+WRITES = ["subdomains"]
 
-    timeout = shared_data.get("enum_timeout", 120)
+ENUM_COMMANDS = {
+    "subfinder": lambda domain: ['subfinder', '-d', domain, '-silent'],
+    "assetfinder": lambda domain: ['assetfinder', '--subs-only', domain],
+}
+# Seconds to keep reading tools' output after they are killed at the deadline
+DRAIN_TIMEOUT = 2
+
+def normalize_subdomain(name, domain):
+    name = name.strip().lower().rstrip('.')
+    if name.startswith('*.'):
+        name = name[2:]
+    if not name or ' ' in name:
+        return None
+    if name != domain and not name.endswith('.' + domain):
+        return None
+    return name
 
+def _pump(tool, proc, lines):
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-        if result.returncode == 0:
-            subdomains = list(set(result.stdout.strip().split('\n')))
-            logging.info(f"Found {len(subdomains)} subdomains for {domain}")
-            return subdomains
-        else:
-            logging.warning(f"{tool} failed for {domain}, attempting fallback.")
-    except Exception as e:
-        logging.warning(f"{tool} error: {e}, attempting fallback.")
-
-    # Fallback to assetfinder (only if it wasn't already used)
-    if tool.lower() != 'assetfinder':
-        fallback_cmd = ['assetfinder', '--subs-only', domain]
+        for line in proc.stdout:
+            lines.put((tool, line))
+    except ValueError:
+        pass  # stdout closed after the process was killed
+    finally:
+        lines.put((tool, None))
+
+def stream_subdomains(domain, tools=("subfinder", "assetfinder"), timeout=120):
+    """
+    Run every enumeration tool at once and yield each new, normalized
+    subdomain as soon as any tool prints it. A tool still running at the
+    deadline is killed, and whatever it printed before that is still yielded.
+    """
+    domain = domain.strip().lower().rstrip('.')
+    lines = queue.Queue()
+    procs = {}
+    for tool in tools:
         try:
-            fallback_result = subprocess.run(fallback_cmd, capture_output=True, text=True, timeout=60)
-            if fallback_result.returncode == 0:
-                subdomains = list(set(fallback_result.stdout.strip().split('\n')))
-                logging.info(f"Assetfinder found {len(subdomains)} subdomains for {domain}")
-                return subdomains
-            else:
-                logging.error(f"Assetfinder also failed for {domain}: {fallback_result.stderr}")
-        except Exception as e:
-            logging.error(f"Assetfinder exception for {domain}: {e}")
-    
-    return []  # Fallback also failed
-
-def run(shared_data):
+            procs[tool] = subprocess.Popen(ENUM_COMMANDS[tool](domain), stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL, text=True)
+        except (OSError, KeyError) as e:
+            logging.warning(f"Could not start {tool}: {e}")
+            continue
+        threading.Thread(target=_pump, args=(tool, procs[tool], lines), daemon=True).start()
+
+    seen = set()
+    counts = {tool: 0 for tool in procs}
+    open_streams = len(procs)
+    deadline = time.monotonic() + timeout
+    draining = False
+    try:
+        while open_streams:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if draining:
+                    break
+                still_running = [t for t, p in procs.items() if p.poll() is None]
+                logging.warning(f"Enumeration timeout after {timeout}s; keeping partial results from {', '.join(still_running)}")
+                # Killing closes the pipes, so the pumps deliver what was printed and then end
+                for tool in still_running:
+                    procs[tool].kill()
+                draining = True
+                deadline = time.monotonic() + DRAIN_TIMEOUT
+                continue
+            try:
+                tool, line = lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            name = normalize_subdomain(line, domain)
+            if name and name not in seen:
+                seen.add(name)
+                counts[tool] += 1
+                yield name
+    finally:
+        for tool, proc in procs.items():
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            if proc.returncode and proc.returncode > 0:
+                logging.warning(f"{tool} exited with status {proc.returncode} for {domain}")
+        for tool, count in counts.items():
+            logging.info(f"{tool} contributed {count} new subdomains for {domain}")
+
+def run_subdomain_enumeration(domain, shared_data, tools=("subfinder", "assetfinder"), on_subdomain=None):
+    logging.info(f"Starting subdomain enumeration on: {domain} using {', '.join(tools)}")
+    timeout = shared_data.get("enum_timeout", 120)
+
+    subdomains = []
+    for name in stream_subdomains(domain, tools, timeout):
+        subdomains.append(name)
+        if on_subdomain:
+            on_subdomain(name)
+    logging.info(f"Found {len(subdomains)} subdomains for {domain}")
+    return subdomains
+
+def run(shared_data, on_subdomain=None):
     logging.info("Running Subdomain Enumeration Module")
     root_domain = shared_data.get("root_domain")
     if not root_domain:
         logging.error("No root domain provided in shared_data['root_domain']")
         return []
 
-    subdomains = run_subdomain_enumeration(root_domain, shared_data)
+    # Later stages' prefetch hooks start on names as they stream in
+    submit, close = prefetch.start(shared_data)
+
+    def found(name):
+        submit(name)
+        if on_subdomain:
+            on_subdomain(name)
+
+    try:
+        subdomains = run_subdomain_enumeration(root_domain, shared_data, on_subdomain=found)
+    finally:
+        close()
     shared_data["subdomains"] = subdomains
     return subdomains
@@ -1,20 +1,23 @@
 
-import requests
 import logging
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
+from http_engine import fetch_all, prefetch_pages
+from incremental import probe_targets, carry_forward
+from html_document import parse_document
+
+READS = ["subdomains", "cert_domains", "incremental_plan"]
+WRITES = ["supply_chain"]
+# Pages are fetched into the session cache while enumeration runs
+PREFETCH = prefetch_pages
 
 def extract_third_party_domains(html, base_url):
-    soup = BeautifulSoup(html, 'html.parser')
     domains = set()
 
-    for tag in soup.find_all(["script", "link", "img", "iframe"]):
-        src = tag.get("src") or tag.get("href")
-        if src:
-            full_url = urljoin(base_url, src)
-            domain = urlparse(full_url).netloc
-            if domain and not domain.endswith(base_url):
-                domains.add(domain)
+    for _, src in parse_document(html).resources:
+        full_url = urljoin(base_url, src)
+        domain = urlparse(full_url).netloc
+        if domain and not domain.endswith(base_url):
+            domains.add(domain)
     return list(domains)
 
 def run(shared_data):
@@ -29,19 +32,22 @@ def run(shared_data):
         logging.warning("No subdomains to scan for third-party supply chain domains.")
         return {}
 
+    subdomains = probe_targets(shared_data, subdomains)
     supply_map = {}
 
+    responses = fetch_all([f"https://{domain}" for domain in subdomains], shared_data, timeout=5)
+
     for domain in subdomains:
         url = f"https://{domain}"
-        try:
-            r = requests.get(url, timeout=5)
-            if r.status_code == 200:
-                vendors = extract_third_party_domains(r.text, url)
-                if vendors:
-                    supply_map[domain] = vendors
-                    logging.info(f"{domain} includes {len(vendors)} third-party services")
-        except Exception as e:
-            logging.debug(f"Failed to fetch {url}: {e}")
-
+        r = responses.get(url, {})
+        if "error" in r:
+            logging.debug(f"Failed to fetch {url}: {r.get('detail', r['error'])}")
+        elif r["status_code"] == 200:
+            vendors = extract_third_party_domains(r["text"], url)
+            if vendors:
+                supply_map[domain] = vendors
+                logging.info(f"{domain} includes {len(vendors)} third-party services")
+
+    supply_map = carry_forward(shared_data, "supply_chain", supply_map)
     shared_data["supply_chain"] = supply_map
     return supply_map
\ No newline at end of file
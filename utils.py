@@ -1,7 +1,21 @@
 
-#from dotenv import load_dotenv
 import os
 
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    def load_dotenv(dotenv_path):
+        # Minimal KEY=VALUE reader for when python-dotenv is not installed
+        if not os.path.isfile(dotenv_path):
+            return False
+        with open(dotenv_path) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    key, value = line.split("=", 1)
+                    os.environ.setdefault(key.strip(), value.strip().strip('"').strip("'"))
+        return True
+
 def get_api_key(name):
     """
     Loads a named API key from config/api_keys.env.
@@ -9,3 +23,14 @@ def get_api_key(name):
     """
     load_dotenv(dotenv_path="config/api_keys.env")
     return os.getenv(name)
+
+
+def ask_fast_mode(shared_data, question):
+    """
+    Per-module fast-mode prompt. When the session is non-interactive
+    (parallel pipeline, batch runs) the session-wide fast_mode is used instead.
+    """
+    if shared_data.get("non_interactive"):
+        return shared_data.get("fast_mode", True)
+    from rich.prompt import Prompt
+    return Prompt.ask(question, choices=["y", "n"], default="y") == "y"
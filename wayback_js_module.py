@@ -1,36 +1,276 @@
 
+import asyncio
+import base64
+import hashlib
+import os
+import time
 import requests
 import logging
+from urllib.parse import urlparse
+from utils import ask_fast_mode
+from session_store import load_progress, save_progress
+from http_engine import open_session, fetch
+from signatures import SignatureSet
+from disk_cache import DiskCache
 
-def fetch_wayback_js(domain):
-    url = f"https://web.archive.org/cdx/search/cdx?url={domain}/*&output=json&fl=original"
+READS = ["root_domain"]
+WRITES = ["wayback_js", "wayback_js_captures", "wayback_js_findings"]
+
+CDX_API_URL = os.getenv("WAYBACK_CDX_URL", "https://web.archive.org/cdx/search/cdx")
+WAYBACK_WEB_URL = os.getenv("WAYBACK_WEB_URL", "https://web.archive.org/web")
+FAST_MODE_LIMIT = 500
+PAGE_SIZE = 5000
+CDX_TIMEOUT = 60
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Filtering and de-duplication happen on the archive's side, so only one
+# successful capture per distinct .js URL (cache-busting query included) is sent back
+CDX_FILTERS = [r"original:.*\.js(\?.*)?$", "statuscode:200"]
+CDX_FIELDS = "original,timestamp,digest"
+
+DEFAULT_MINING_WORKERS = 8
+SNAPSHOT_TIMEOUT = 30
+MAX_JS_BYTES = 5 * 1024 * 1024
+# Bump when the signatures change so cached findings are recomputed
+FINDINGS_VERSION = 1
+
+JS_FINDING_SIGNATURES = SignatureSet(
+    patterns={
+        "endpoint": r"""["'`]/(?:api|v\d+|rest|graphql|internal|admin|auth|oauth|private)\b[\w\-/.{}:]*["'`]""",
+        "url": r"""\bhttps?://[a-z0-9][a-z0-9.\-]*\.[a-z]{2,}(?::\d+)?[^\s"'`<>)]*""",
+        "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+        "google_api_key": r"\bAIza[0-9A-Za-z_\-]{35}",
+        "github_token": r"\bgh[pousr]_[A-Za-z0-9]{36,}",
+        "slack_token": r"\bxox[abprs]-[A-Za-z0-9\-]{10,}",
+        "private_key": r"-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----",
+        "generic_secret": r"""(?:api[_\-]?key|secret|access[_\-]?token|auth[_\-]?token|passw(?:or)?d)["']?\s*[:=]\s*["'][^"'\s]{12,}["']""",
+    },
+    anchors={
+        "endpoint": ["/api", "/v", "/rest", "/graphql", "/internal", "/admin", "/auth", "/oauth", "/private"],
+        "url": ["http"],
+        "aws_access_key": ["akia", "asia"],
+        "google_api_key": ["aiza"],
+        "github_token": ["ghp_", "gho_", "ghu_", "ghs_", "ghr_"],
+        "slack_token": ["xox"],
+        "private_key": ["private key"],
+        "generic_secret": ["key", "secret", "token", "passw"],
+    },
+)
+SECRET_SIGNATURES = {"aws_access_key", "google_api_key", "github_token", "slack_token", "private_key",
+                     "generic_secret"}
+
+def cdx_params(domain, resume_key=None, page_size=PAGE_SIZE):
+    params = [
+        ("url", f"{domain}/*"),
+        ("fl", CDX_FIELDS),
+        ("collapse", "urlkey"),
+        ("limit", page_size),
+        ("showResumeKey", "true"),
+    ]
+    params += [("filter", f) for f in CDX_FILTERS]
+    if resume_key:
+        params.append(("resumeKey", resume_key))
+    return params
+
+def parse_cdx_lines(lines):
+    """
+    Yield capture dicts from a plain-text CDX response, one line at a time,
+    and finally ("resume", key) if the server reported more pages.
+    Results and the resume key are separated by a blank line.
+    """
+    after_results = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            after_results = True
+            continue
+        if after_results:
+            yield "resume", line
+            return
+        fields = line.split(" ")
+        if len(fields) >= 3:
+            yield "capture", {"url": fields[0], "timestamp": fields[1], "digest": fields[2]}
+
+def _open_page(session, endpoint, params):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(endpoint, params=params, timeout=CDX_TIMEOUT, stream=True)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            logging.warning(f"CDX request failed ({e}), retrying")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                response.raise_for_status()
+                return response
+            response.close()
+            logging.warning(f"CDX returned {response.status_code}, retrying")
+        time.sleep(BACKOFF_BASE ** attempt)
+
+def iter_cdx_pages(domain, endpoint=CDX_API_URL, resume_key=None, page_size=PAGE_SIZE):
+    """
+    Yield (captures, resume_key) per CDX page, parsing each response as it
+    streams in. resume_key is None on the last page.
+    """
+    with requests.Session() as session:
+        while True:
+            captures, next_key = [], None
+            with _open_page(session, endpoint, cdx_params(domain, resume_key, page_size)) as response:
+                # iter_lines only decodes when an encoding is known
+                response.encoding = response.encoding or "utf-8"
+                for kind, value in parse_cdx_lines(response.iter_lines(decode_unicode=True)):
+                    if kind == "resume":
+                        next_key = value
+                    else:
+                        captures.append(value)
+            yield captures, next_key
+            if not next_key or not captures:
+                return
+            resume_key = next_key
+
+def fetch_wayback_js(domain, limit=None, shared_data=None):
+    """
+    Archived .js captures under domain as [{"url", "timestamp", "digest"}],
+    stopping once limit URLs are collected. Each finished page is
+    checkpointed with its resume key, so a resumed session carries on from
+    the next page.
+    """
+    shared_data = shared_data if shared_data is not None else {}
+    endpoint = shared_data.get("wayback_cdx_url") or CDX_API_URL
     logging.info(f"Querying Wayback Machine for {domain}")
-    js_urls = []
 
+    done = load_progress(shared_data, __name__)
+    captures, resume_key = [], None
+    for page in sorted(done, key=lambda k: int(k.split(":")[1])):
+        captures.extend(done[page]["captures"])
+        resume_key = done[page]["resume_key"]
+    pages = len(done)
+    if done:
+        logging.info(f"Resuming Wayback query: {pages} pages, {len(captures)} JS URLs already fetched")
+        if resume_key is None or (limit is not None and len(captures) >= limit):
+            return captures[:limit]
+
+    seen = {c["url"] for c in captures}
+    # In fast mode the server is asked for no more rows than the limit needs
+    page_size = min(PAGE_SIZE, limit) if limit is not None else PAGE_SIZE
     try:
-        r = requests.get(url, timeout=30)
-        if r.status_code == 200:
-            data = r.json()
-            for entry in data[1:]:  # Skip header row
-                full_url = entry[0]
-                if full_url.endswith(".js"):
-                    js_urls.append(full_url)
-            logging.info(f"Found {len(js_urls)} JS URLs for {domain}")
-        else:
-            logging.warning(f"Wayback response {r.status_code} for {domain}")
+        for page, resume_key in iter_cdx_pages(domain, endpoint, resume_key, page_size):
+            page = [c for c in page if c["url"] not in seen]
+            if limit is not None:
+                page = page[:max(0, limit - len(captures))]
+            seen.update(c["url"] for c in page)
+            captures.extend(page)
+            pages += 1
+            save_progress(shared_data, __name__, f"page:{pages}", {"captures": page, "resume_key": resume_key})
+            logging.debug(f"Wayback page {pages}: {len(captures)} JS URLs so far")
+            if limit is not None and len(captures) >= limit:
+                break
+        logging.info(f"Found {len(captures)} JS URLs for {domain} in {pages} CDX pages")
     except Exception as e:
         logging.error(f"Error querying Wayback for {domain}: {e}")
-    return js_urls
+    return captures
+
+def content_digest(body):
+    """Base32 SHA-1 of a body, the same form as the CDX digest field."""
+    return base64.b32encode(hashlib.sha1(body).digest()).decode("ascii")
+
+def analyze_js(text):
+    endpoints, hosts, secrets = set(), set(), set()
+    for name, match in JS_FINDING_SIGNATURES.scan(text):
+        if name == "endpoint":
+            endpoints.add(match[1:-1])
+        elif name == "url":
+            host = urlparse(match).hostname
+            if host:
+                hosts.add(host)
+        elif name in SECRET_SIGNATURES:
+            secrets.add((name, match[:200]))
+    return {
+        "endpoints": sorted(endpoints),
+        "hosts": sorted(hosts),
+        "secrets": [{"type": t, "value": v} for t, v in sorted(secrets)],
+    }
+
+async def _download(captures, base_url, workers):
+    sem = asyncio.Semaphore(workers)
+
+    async def get(session, capture):
+        async with sem:
+            snapshot = f"{base_url}/{capture['timestamp']}id_/{capture['url']}"
+            return capture, await fetch(session, snapshot, timeout=SNAPSHOT_TIMEOUT, max_body=MAX_JS_BYTES)
+
+    async with open_session(workers, workers) as session:
+        for next_done in asyncio.as_completed([get(session, c) for c in captures]):
+            yield await next_done
+
+def mine_js(captures, shared_data=None):
+    """
+    Download archived JS and extract endpoints, hostnames and secret-like
+    tokens. Captures sharing a digest are fetched once, and findings are
+    kept on disk by content hash, so bundles analyzed in an earlier run
+    are not downloaded again. Returns [{"digest", "urls", "endpoints",
+    "hosts", "secrets"}] for every bundle with findings.
+    """
+    shared_data = shared_data or {}
+    workers = int(shared_data.get("wayback_workers", DEFAULT_MINING_WORKERS))
+    base_url = (shared_data.get("wayback_web_url") or WAYBACK_WEB_URL).rstrip("/")
+    cache = DiskCache("wayback_js_findings", None)
+
+    urls_by_digest = {}
+    for capture in captures:
+        urls_by_digest.setdefault(capture.get("digest") or capture["url"], []).append(capture)
+    findings, pending = {}, []
+    for digest, group in urls_by_digest.items():
+        cached = cache.get(f"v{FINDINGS_VERSION}:{digest}")
+        if cached is not None:
+            findings[digest] = cached
+        else:
+            pending.append(group[0])
+    logging.info(f"Mining {len(captures)} archived JS captures: {len(urls_by_digest)} distinct bundles, "
+                 f"{len(findings)} already analyzed, downloading {len(pending)}")
+
+    async def collect():
+        failed = 0
+        async for capture, response in _download(pending, base_url, workers):
+            digest = capture.get("digest") or capture["url"]
+            if "error" in response or response["status_code"] != 200:
+                failed += 1
+                logging.debug(f"Could not fetch snapshot of {capture['url']}: "
+                              f"{response.get('detail', response.get('error', response.get('status_code')))}")
+                continue
+            body = response["text"].encode("utf-8", "replace")
+            # Different captures can still carry identical bodies; analyze each body once
+            body_key = f"v{FINDINGS_VERSION}:{content_digest(body)}"
+            result = cache.get(body_key)
+            if result is None:
+                result = analyze_js(response["text"])
+                cache.set(body_key, result)
+            cache.set(f"v{FINDINGS_VERSION}:{digest}", result)
+            findings[digest] = result
+        if failed:
+            logging.warning(f"{failed} archived JS snapshots could not be downloaded")
+
+    if pending:
+        asyncio.run(collect())
+
+    results = []
+    for digest, group in urls_by_digest.items():
+        result = findings.get(digest)
+        if result and (result["endpoints"] or result["hosts"] or result["secrets"]):
+            results.append({"digest": digest, "urls": [c["url"] for c in group], **result})
+    secrets = sum(len(r["secrets"]) for r in results)
+    logging.info(f"Archived JS findings: {len(results)} bundles with endpoints, hosts or secrets "
+                 f"({secrets} secret-like tokens)")
+    return results
 
 def run(shared_data):
 
-    from rich.prompt import Prompt
     from rich.console import Console
-    import time
 
     console = Console()
     console.print("\n[bold cyan]Choose Wayback JS Mining Mode:[/bold cyan]")
-    fast_mode = Prompt.ask("Run in fast mode? (limits to 500 JS files)", choices=["y", "n"], default="y") == "y"
+    fast_mode = ask_fast_mode(shared_data, f"Run in fast mode? (limits to {FAST_MODE_LIMIT} JS files)")
     verbose_mode = not fast_mode
     logging.info("Running Wayback JS Module")
     domain = shared_data.get("root_domain")
@@ -38,6 +278,9 @@ def run(shared_data):
         logging.warning("No root_domain provided to Wayback module.")
         return []
 
-    js_files = fetch_wayback_js(domain)
+    captures = fetch_wayback_js(domain, FAST_MODE_LIMIT if fast_mode else None, shared_data)
+    js_files = [c["url"] for c in captures]
+    shared_data["wayback_js_captures"] = captures
     shared_data["wayback_js"] = js_files
+    shared_data["wayback_js_findings"] = mine_js(captures, shared_data)
     return js_files